@@ -1,5 +1,19 @@
 # https://chat.deepseek.com/a/chat/s/6dafc3d1-b7f9-4555-9ca2-49559b28dec8
 
+import bisect
+import heapq
+import itertools
+import random
+
+try:
+    # Timing spans from Financial Calculation/metrics.py, when it is on the path
+    from metrics import timed
+except ImportError:
+    def timed(name=None):
+        return lambda func: func
+
+
+@timed("knapsack.fractional_knapsack")
 def fractional_knapsack(capacity, weights, values):
     # Calculate value-to-weight ratio for each item and store with weight and value
     n = len(weights)
@@ -18,6 +32,248 @@ def fractional_knapsack(capacity, weights, values):
         capacity -= take
     return total_value
 
+
+@timed("knapsack.fractional_knapsack_select")
+def fractional_knapsack_select(capacity, weights, values):
+    # Expected O(n): instead of sorting every item, partition around a random
+    # ratio (quickselect on the weighted median) and only keep working on
+    # the side where the capacity runs out.
+    n = len(weights)
+    fractions = [0.0] * n
+    total_value = 0.0
+
+    # Zero-weight items cost no capacity: take the ones worth something
+    candidates = []
+    for i in range(n):
+        if weights[i] == 0:
+            if values[i] > 0:
+                fractions[i] = 1.0
+                total_value += values[i]
+        else:
+            candidates.append(i)
+    ratios = [values[i] / weights[i] if weights[i] else 0.0 for i in range(n)]
+
+    while candidates and capacity > 0:
+        pivot = ratios[random.choice(candidates)]
+        higher = [i for i in candidates if ratios[i] > pivot]
+        higher_weight = sum(weights[i] for i in higher)
+        if higher_weight > capacity:
+            # Capacity runs out among the better items
+            candidates = higher
+            continue
+
+        # Every better item fits: take them whole
+        for i in higher:
+            fractions[i] = 1.0
+            total_value += values[i]
+        capacity -= higher_weight
+
+        # Then items at the pivot ratio, as much as fits
+        for i in candidates:
+            if ratios[i] == pivot and capacity > 0:
+                take = min(weights[i], capacity)
+                fractions[i] = take / weights[i]
+                total_value += take * pivot
+                capacity -= take
+
+        candidates = [i for i in candidates if ratios[i] < pivot]
+    return total_value, fractions
+
+
+@timed("knapsack.fractional_knapsack_numpy")
+def fractional_knapsack_numpy(capacity, weights, values, seed=None):
+    # Same partitioning as fractional_knapsack_select, with every pass done
+    # as array operations. Accepts lists or NumPy arrays; seed fixes the
+    # pivot choices.
+    import numpy as np
+
+    weights = np.asarray(weights, dtype=float)
+    values = np.asarray(values, dtype=float)
+    fractions = np.zeros(len(weights))
+
+    # Zero-weight items cost no capacity: take the ones worth something
+    free = weights == 0
+    fractions[free & (values > 0)] = 1.0
+    total_value = values[free & (values > 0)].sum()
+
+    candidates = np.flatnonzero(~free)
+    ratios = np.zeros(len(weights))
+    ratios[candidates] = values[candidates] / weights[candidates]
+    rng = np.random.default_rng(seed)
+
+    while candidates.size and capacity > 0:
+        cand_ratios = ratios[candidates]
+        pivot = cand_ratios[rng.integers(candidates.size)]
+        higher = candidates[cand_ratios > pivot]
+        higher_weight = weights[higher].sum()
+        if higher_weight > capacity:
+            candidates = higher
+            continue
+
+        fractions[higher] = 1.0
+        total_value += values[higher].sum()
+        capacity -= higher_weight
+
+        # Fill the rest from the items at the pivot ratio, in order
+        equal = candidates[cand_ratios == pivot]
+        before = np.cumsum(weights[equal]) - weights[equal]
+        taken = np.clip(capacity - before, 0, weights[equal])
+        fractions[equal] = taken / weights[equal]
+        total_value += taken.sum() * pivot
+        capacity -= taken.sum()
+
+        candidates = candidates[cand_ratios < pivot]
+    return float(total_value), fractions
+
+
+def fractional_knapsack_stream(capacity, items):
+    # One pass over an iterable of (weight, value) pairs, e.g. read from a
+    # file or a generator. A min-heap keeps only the best-ratio items seen so
+    # far that are needed to fill the capacity: whenever the heap can fill it
+    # without its worst item, that item is evicted, as no later item can
+    # bring it back into the optimal set. Memory is bounded by the number of
+    # items that fit (plus zero-weight items, which always fit).
+    # Returns (total_value, {item_index: fraction}) for the items taken.
+    heap = []
+    heap_weight = 0.0
+    free = {}
+    for index, (weight, value) in enumerate(items):
+        if weight == 0:
+            if value > 0:
+                free[index] = value
+            continue
+        heapq.heappush(heap, (value / weight, index, weight, value))
+        heap_weight += weight
+        while heap and heap_weight - heap[0][2] >= capacity:
+            heap_weight -= heapq.heappop(heap)[2]
+
+    total_value = sum(free.values())
+    fractions = dict.fromkeys(free, 1.0)
+    # Fill from the best ratio down; only the worst kept item can be partial
+    for ratio, index, weight, value in sorted(heap, reverse=True):
+        if capacity <= 0:
+            break
+        take = min(weight, capacity)
+        fractions[index] = take / weight
+        total_value += take * ratio
+        capacity -= take
+    return total_value, fractions
+
+
+class FractionalKnapsackSolver:
+    # For what-if sweeps where only the capacity changes: items are sorted by
+    # ratio once, with prefix sums of weight and value, so each capacity is
+    # answered by a binary search in O(log n).
+    #
+    # insert/remove place or drop a single item in the sorted order (no
+    # re-sort) and only the prefix sums after that position are recomputed,
+    # lazily, on the next query.
+
+    def __init__(self, weights=(), values=()):
+        self._keys = []      # (-ratio, item_id), sorted: best ratio first
+        self._weights = []
+        self._values = []
+        self._items = {}     # item_id -> (weight, value)
+        self._free = {}      # zero-weight items: item_id -> value
+        self._next_id = 0
+        self._prefix_weight = [0.0]
+        self._prefix_value = [0.0]
+        self._dirty_from = 0
+
+        items = []
+        for weight, value in zip(weights, values):
+            item_id = self._new_id(weight, value)
+            if weight == 0:
+                self._free[item_id] = value
+            else:
+                items.append((-(value / weight), item_id, weight, value))
+        items.sort()
+        self._keys = [(key, item_id) for key, item_id, _, _ in items]
+        self._weights = [weight for _, _, weight, _ in items]
+        self._values = [value for _, _, _, value in items]
+
+    def _new_id(self, weight, value):
+        item_id = self._next_id
+        self._next_id += 1
+        self._items[item_id] = (weight, value)
+        return item_id
+
+    def _mark_dirty(self, pos):
+        if self._dirty_from is None or pos < self._dirty_from:
+            self._dirty_from = pos
+
+    def insert(self, weight, value):
+        """Add an item and return its id."""
+        item_id = self._new_id(weight, value)
+        if weight == 0:
+            self._free[item_id] = value
+            return item_id
+        key = (-(value / weight), item_id)
+        pos = bisect.bisect_left(self._keys, key)
+        self._keys.insert(pos, key)
+        self._weights.insert(pos, weight)
+        self._values.insert(pos, value)
+        self._mark_dirty(pos)
+        return item_id
+
+    def remove(self, item_id):
+        weight, value = self._items.pop(item_id)
+        if weight == 0:
+            del self._free[item_id]
+            return
+        pos = bisect.bisect_left(self._keys, (-(value / weight), item_id))
+        del self._keys[pos], self._weights[pos], self._values[pos]
+        self._mark_dirty(pos)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _prefix(self):
+        start = self._dirty_from
+        if start is not None:
+            for prefix, column in ((self._prefix_weight, self._weights), (self._prefix_value, self._values)):
+                base = prefix[start]
+                del prefix[start:]
+                prefix.extend(itertools.accumulate(column[start:], initial=base))
+            self._dirty_from = None
+        return self._prefix_weight, self._prefix_value
+
+    def _free_value(self):
+        return sum(value for value in self._free.values() if value > 0)
+
+    def query(self, capacity):
+        """Maximum value for one capacity."""
+        prefix_weight, prefix_value = self._prefix()
+        capacity = max(capacity, 0)
+        # k items fit whole; item k (if any) fills the rest
+        k = bisect.bisect_right(prefix_weight, capacity) - 1
+        total_value = prefix_value[k]
+        if k < len(self._weights):
+            total_value += (capacity - prefix_weight[k]) * -self._keys[k][0]
+        return total_value + self._free_value()
+
+    def query_many(self, capacities):
+        """Maximum value for each capacity in a list or array, in one call."""
+        import numpy as np
+
+        prefix_weight, prefix_value = (np.asarray(p) for p in self._prefix())
+        ratios = np.array([-key for key, _ in self._keys] + [0.0])
+        capacities = np.maximum(np.asarray(capacities, dtype=float), 0)
+        k = np.searchsorted(prefix_weight, capacities, side="right") - 1
+        return prefix_value[k] + (capacities - prefix_weight[k]) * ratios[k] + self._free_value()
+
+    def take(self, capacity):
+        """Fractions taken at this capacity, as {item_id: fraction} for items taken at all."""
+        prefix_weight, _ = self._prefix()
+        capacity = max(capacity, 0)
+        k = bisect.bisect_right(prefix_weight, capacity) - 1
+        fractions = {item_id: 1.0 for item_id, value in self._free.items() if value > 0}
+        fractions.update((item_id, 1.0) for _, item_id in self._keys[:k])
+        if k < len(self._weights) and capacity > prefix_weight[k]:
+            fractions[self._keys[k][1]] = (capacity - prefix_weight[k]) / self._weights[k]
+        return fractions
+
+
 # Example usage:
 if __name__ == "__main__":
     weights = [10, 20, 30]
@@ -26,6 +282,13 @@ if __name__ == "__main__":
     max_value = fractional_knapsack(capacity, weights, values)
     print(f"Maximum value in knapsack: {max_value}")
 
+    max_value, fractions = fractional_knapsack_select(capacity, weights, values)
+    print(f"Maximum value (selection): {max_value}, fractions taken: {fractions}")
+
+    solver = FractionalKnapsackSolver(weights, values)
+    for c in (10, 30, 50, 70):
+        print(f"Capacity {c}: {solver.query(c)}")
+
 """
 Potential Solution Explanation:
 - Calculate the value-to-weight ratio for each item.
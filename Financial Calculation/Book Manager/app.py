@@ -1,6 +1,14 @@
+import io
+import os
+import sys
 import streamlit as st
 import pandas as pd
-from database import init_db, add_book, get_books, update_book, delete_book
+
+# metrics.py is shared with the other Financial Calculation tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import (init_db, add_book, get_book, get_books_page, update_book, delete_book,
+                      import_books, search_books, get_summary, get_breakdown, transaction, PAGE_SIZE)
+from metrics import span, diagnostics_panel
 
 # Initialize DB
 init_db()
@@ -50,6 +58,24 @@ with st.form("add_book_form"):
             else:
                 st.warning("⚠️ Title and Author are required!")
 
+# Bulk Import
+with st.expander("📥 Import Books (CSV or JSONL)"):
+    uploaded = st.file_uploader("Upload a file", type=["csv", "jsonl"], key="import_file")
+    if uploaded is not None and st.button("Import", key="import_button"):
+        fmt = "jsonl" if uploaded.name.endswith(".jsonl") else "csv"
+        try:
+            # One transaction, so a file that fails to decode part way imports nothing;
+            # utf-8-sig drops the BOM Excel writes, newline="" keeps quoted line breaks
+            with transaction():
+                imported, errors = import_books(io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline=""), fmt)
+        except UnicodeDecodeError:
+            st.error("❌ The file is not UTF-8 encoded text; nothing was imported.")
+        else:
+            st.success(f"✅ Imported {imported} books")
+            if errors:
+                st.warning(f"⚠️ {len(errors)} rows skipped")
+                st.dataframe(pd.DataFrame(errors, columns=["Row", "Error"]), use_container_width=True)
+
 # Display Books
 # st.subheader("📖 Your Book Collection")
 # books = get_books()
@@ -68,62 +94,101 @@ with st.form("add_book_form"):
 # st.dataframe(filtered_df.drop(columns=["ID"]), use_container_width=True)
 
 st.subheader("📖 Your Book Collection")
-books = get_books()
-df = pd.DataFrame(books, columns=["ID", "Title", "Author", "Genre", "Purchase Date", "Cost", "Audiobook", "Status", "Notes"])
-
-search = st.text_input("🔍 Search by Title or Author")
-filtered_df = df[df["Title"].str.contains(search, case=False) | df["Author"].str.contains(search, case=False)]
-
-for _, row in filtered_df.iterrows():
-    status = row["Status"]
-    color = {
-        "To Read": "red",
-        "Reading": "green",
-        "Completed": "blue"
-    }.get(status, "gray")
-
-    st.markdown(
-        f"""
+COLUMNS = ["ID", "Title", "Author", "Genre", "Purchase Date", "Cost", "Audiobook", "Status", "Notes"]
+STATUS_COLORS = {
+    "To Read": "red",
+    "Reading": "green",
+    "Completed": "blue"
+}
+
+search = st.text_input("🔍 Search by Title, Author, Genre or Notes")
+status_filter = st.selectbox("Status", ["All", "To Read", "Reading", "Completed"], key="status_filter")
+filters = {"search": search.strip(), "status": None if status_filter == "All" else status_filter}
+
+# Keyset paging: page_cursors holds the after_id of every page visited so far.
+# A new search or filter starts again from the first page.
+if st.session_state.get("page_filters") != filters:
+    st.session_state.page_filters = filters
+    st.session_state.page_cursors = [0]
+cursors = st.session_state.page_cursors
+
+# Fetch one extra row to know whether there is a next page
+page = get_books_page(cursors[-1], PAGE_SIZE + 1, filters)
+has_next = len(page) > PAGE_SIZE
+page = page[:PAGE_SIZE]
+
+def book_card(row):
+    book_id, title, author, genre, purchase_date, cost, link, status, notes = row
+    color = STATUS_COLORS.get(status, "gray")
+    return f"""
         <div style="border:1px solid #ddd; border-radius:8px; padding:10px; margin-bottom:10px;">
-            <h4>{row['Title']} <span style="background-color:{color}; color:white; padding:2px 6px; border-radius:5px; font-size:0.8em;">{status}</span></h4>
-            <b>Author:</b> {row['Author']}<br>
-            <b>Genre:</b> {row['Genre']}<br>
-            <b>Purchase Date:</b> {row['Purchase Date']}<br>
-            <b>Cost:</b> ₹{row['Cost']}<br>
-            <b>Audiobook:</b> <a href="{row['Audiobook']}" target="_blank">{row['Audiobook']}</a><br>
-            <b>Notes:</b> {row['Notes']}<br>
+            <h4>{title} <span style="background-color:{color}; color:white; padding:2px 6px; border-radius:5px; font-size:0.8em;">{status}</span></h4>
+            <b>Author:</b> {author}<br>
+            <b>Genre:</b> {genre}<br>
+            <b>Purchase Date:</b> {purchase_date or ""}<br>
+            <b>Cost:</b> ₹{cost}<br>
+            <b>Audiobook:</b> <a href="{link}" target="_blank">{link}</a><br>
+            <b>Notes:</b> {notes}<br>
         </div>
-        """,
-        unsafe_allow_html=True
-    )
-
+        """
+
+with span("ui.book_cards"):
+    if page:
+        # The whole page of cards goes out as a single markdown block
+        st.markdown("".join(book_card(row) for row in page), unsafe_allow_html=True)
+    else:
+        st.info("No books found.")
+
+col_prev, col_page, col_next = st.columns([1, 2, 1])
+if col_prev.button("◀ Previous", disabled=len(cursors) == 1):
+    cursors.pop()
+    st.rerun()
+col_page.markdown(f"Page {len(cursors)}")
+if col_next.button("Next ▶", disabled=not has_next):
+    cursors.append(page[-1][0])
+    st.rerun()
 
 # Export
-csv = filtered_df.to_csv(index=False).encode("utf-8")
-st.download_button("⬇️ Export as CSV", data=csv, file_name="books.csv", mime="text/csv")
-
-for _, row in filtered_df.iterrows():
-    with st.expander(f"📘 {row['Title']} by {row['Author']}"):
-        col1, col2, col3 = st.columns(3)
-        new_title = col1.text_input("Title", row["Title"], key=f"title_{row['ID']}")
-        new_author = col2.text_input("Author", row["Author"], key=f"author_{row['ID']}")
-        new_genre = col3.text_input("Genre", row["Genre"], key=f"genre_{row['ID']}")
-        new_date = col1.date_input("Purchase Date", pd.to_datetime(row["Purchase Date"]), key=f"date_{row['ID']}")
-        new_cost = col2.number_input("Cost", value=row["Cost"], key=f"cost_{row['ID']}")
-        new_link = col3.text_input("Audiobook Link", row["Audiobook"], key=f"link_{row['ID']}")
-        new_status = col1.selectbox("Status", ["To Read", "Reading", "Completed"], index=["To Read", "Reading", "Completed"].index(row["Status"]), key=f"status_{row['ID']}")
-        new_notes = st.text_area("Notes", row["Notes"], key=f"notes_{row['ID']}")
-
-        col_save, col_delete = st.columns([1, 1])
-        if col_save.button("💾 Save Changes", key=f"save_{row['ID']}"):
-            update_book(row["ID"], (new_title, new_author, new_genre, str(new_date), new_cost, new_link, new_status, new_notes))
-            st.success("✅ Book updated!")
-            st.rerun()
-
-        if col_delete.button("🗑️ Delete Book", key=f"delete_{row['ID']}"):
-            delete_book(row["ID"])
-            st.warning("⚠️ Book deleted!")
-            st.rerun()
+# Loading every matching row is only done when the user asks for it
+if st.button("📄 Prepare CSV Export"):
+    export_df = pd.DataFrame(search_books(filters["search"], limit=None), columns=COLUMNS)
+    if filters["status"]:
+        export_df = export_df[export_df["Status"] == filters["status"]]
+    csv = export_df.to_csv(index=False).encode("utf-8")
+    st.download_button("⬇️ Export as CSV", data=csv, file_name="books.csv", mime="text/csv")
+
+# Edit widgets are only built for the selected book
+if page:
+    labels = {row[0]: f"📘 {row[1]} by {row[2]}" for row in page}
+    selected_id = st.selectbox("✏️ Edit a book on this page", [None] + list(labels),
+                               format_func=lambda book_id: "—" if book_id is None else labels[book_id])
+    row = get_book(selected_id) if selected_id is not None else None
+    if row is not None:
+        row = dict(zip(COLUMNS, row))
+        with st.expander(labels[selected_id], expanded=True):
+            col1, col2, col3 = st.columns(3)
+            new_title = col1.text_input("Title", row["Title"], key=f"title_{row['ID']}")
+            new_author = col2.text_input("Author", row["Author"], key=f"author_{row['ID']}")
+            new_genre = col3.text_input("Genre", row["Genre"], key=f"genre_{row['ID']}")
+            # Books imported without a date have none to show
+            purchase_date = pd.to_datetime(row["Purchase Date"], errors="coerce")
+            new_date = col1.date_input("Purchase Date", None if pd.isna(purchase_date) else purchase_date,
+                                       key=f"date_{row['ID']}")
+            new_cost = col2.number_input("Cost", value=row["Cost"], key=f"cost_{row['ID']}")
+            new_link = col3.text_input("Audiobook Link", row["Audiobook"], key=f"link_{row['ID']}")
+            new_status = col1.selectbox("Status", ["To Read", "Reading", "Completed"], index=["To Read", "Reading", "Completed"].index(row["Status"]), key=f"status_{row['ID']}")
+            new_notes = st.text_area("Notes", row["Notes"], key=f"notes_{row['ID']}")
+
+            col_save, col_delete = st.columns([1, 1])
+            if col_save.button("💾 Save Changes", key=f"save_{row['ID']}"):
+                update_book(row["ID"], (new_title, new_author, new_genre, new_date and new_date.isoformat(), new_cost, new_link, new_status, new_notes))
+                st.success("✅ Book updated!")
+                st.rerun()
+
+            if col_delete.button("🗑️ Delete Book", key=f"delete_{row['ID']}"):
+                delete_book(row["ID"])
+                st.warning("⚠️ Book deleted!")
+                st.rerun()
 
 # # === Summary Tab at the Bottom ===
 # st.markdown("---")  # Horizontal separator
@@ -145,10 +210,12 @@ for _, row in filtered_df.iterrows():
 # === Summary Tab at the Bottom ===
 st.markdown("---")  # Horizontal separator
 
-total_books = df.shape[0]
-total_books_read = df[df["Status"] == "Completed"].shape[0]
-total_books_unread = df[df["Status"] == "To Read"].shape[0]
-total_spent = df["Cost"].sum()
+# Counts come from the trigger-maintained stats table, not from the books
+summary = get_summary()
+total_books = summary["total_books"]
+total_books_read = summary["completed"]
+total_books_unread = summary["to_read"]
+total_spent = summary["total_spent"]
 
 st.markdown(
     f"""
@@ -161,4 +228,15 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+with st.expander("📊 Spending Breakdown"):
+    col_genre, col_month = st.columns(2)
+    col_genre.markdown("**By Genre**")
+    col_genre.dataframe(pd.DataFrame(get_breakdown("genre"), columns=["Genre", "Books", "Spent"]),
+                        use_container_width=True, hide_index=True)
+    col_month.markdown("**By Purchase Month**")
+    col_month.dataframe(pd.DataFrame(get_breakdown("month"), columns=["Month", "Books", "Spent"]),
+                        use_container_width=True, hide_index=True)
+
+diagnostics_panel(st.sidebar)
@@ -1,56 +1,598 @@
+import csv
+import json
 import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import wraps
+from itertools import islice
 
+try:
+    # Timing spans from Financial Calculation/metrics.py; app.py puts it on the path
+    from metrics import timed, count
+except ImportError:
+    def timed(name=None):
+        return lambda func: func
+
+    def count(name, n=1):
+        pass
+
+DB_PATH = "books.db"
+
+BOOK_FIELDS = ["title", "author", "genre", "purchase_date", "cost", "audiobook_link", "status", "notes"]
+STATUSES = ["To Read", "Reading", "Completed"]
+IMPORT_CHUNK_SIZE = 1000
+# SQLite's default limit on bound parameters per statement is 999
+MAX_PARAMS = 900
+
+# Applied once to every new connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Streamlit runs every script rerun on a fresh thread and an sqlite3
+# connection must only be used by one thread at a time. Each thread checks
+# out a connection from a shared pool; connections of threads that have
+# finished go back to the pool and are reused by the next rerun.
+_local = threading.local()
+_pool_lock = threading.Lock()
+_idle = []
+_owners = {}
+# Database file each pooled connection was opened on
+_paths = {}
+
+
+def _open_connection():
+    # Autocommit mode; transactions are opened explicitly by transaction()
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_PATH:
+        return conn
+    with _pool_lock:
+        if conn is not None:
+            # DB_PATH changed since this thread connected
+            _owners.pop(threading.get_ident(), None)
+            conn.close()
+        # Thread idents are recycled, so an entry under our own ident was
+        # left behind by a finished thread as well
+        alive = {thread.ident for thread in threading.enumerate()} - {threading.get_ident()}
+        for ident in [i for i in _owners if i not in alive]:
+            released = _owners.pop(ident)
+            if released.in_transaction:
+                released.rollback()
+            _idle.append(released)
+        conn = None
+        while _idle:
+            candidate = _idle.pop()
+            if _paths.get(candidate) == DB_PATH:
+                conn = candidate
+                break
+            _paths.pop(candidate, None)
+            candidate.close()
+        if conn is None:
+            conn = _open_connection()
+            _paths[conn] = DB_PATH
+        _owners[threading.get_ident()] = conn
+    _local.conn = conn
+    _local.path = DB_PATH
+    _local.depth = 0
+    return conn
+
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        with _pool_lock:
+            _owners.pop(threading.get_ident(), None)
+            _paths.pop(conn, None)
+        conn.close()
+        _local.conn = None
+
+
+@contextmanager
+def transaction():
+    """Run the block in one transaction, committed once at the end.
+
+    Nested blocks join the outer transaction, so several writes made during
+    one Streamlit interaction can share a single commit.
+    """
+    conn = get_connection()
+    depth = _local.depth
+    if depth == 0:
+        conn.execute("BEGIN")
+        changes = conn.total_changes
+    _local.depth = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth = depth
+        if depth == 0:
+            conn.execute("ROLLBACK")
+        raise
+    _local.depth = depth
+    if depth == 0:
+        conn.execute("COMMIT")
+        # init_db runs on every rerun but rarely changes anything
+        if conn.total_changes != changes:
+            _bump_version()
+
+
+# ---------- Read cache ----------
+# Query results are cached under a data version that every commit made
+# through transaction() bumps. Commits from other processes are noticed
+# through PRAGMA data_version. A result cached under an old version can
+# never be returned, so the cache is never stale.
+
+CACHE_SIZE = 256
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+_version = 0
+_seen_data_version = {}
+
+
+def _bump_version():
+    global _version
+    with _cache_lock:
+        _version += 1
+        _cache.clear()
+
+
+def _current_version(conn):
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    # A connection seen for the first time has no baseline, so be safe
+    if _seen_data_version.get(conn) != data_version:
+        _seen_data_version[conn] = data_version
+        _bump_version()
+    return _version
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def cached_query(func):
+    """Cache a read-only query function. Callers must not mutate the result."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = get_connection()
+        if _local.depth:
+            # Inside an open transaction: uncommitted writes are visible
+            return func(*args, **kwargs)
+        version = _current_version(conn)
+        key = (func.__name__, _freeze(args), _freeze(kwargs), DB_PATH)
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                _cache_stats["hits"] += 1
+                count("db.cache_hit")
+                return _cache[key]
+            _cache_stats["misses"] += 1
+        count("db.cache_miss")
+        result = func(*args, **kwargs)
+        with _cache_lock:
+            if _version == version:
+                _cache[key] = result
+                if len(_cache) > CACHE_SIZE:
+                    _cache.popitem(last=False)
+        return result
+    return wrapper
+
+
+def cache_info():
+    with _cache_lock:
+        return {**_cache_stats, "size": len(_cache), "version": _version}
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats["hits"] = _cache_stats["misses"] = 0
+
+
+@timed("db.init_db")
 def init_db():
-    conn = sqlite3.connect("books.db")
-    cur = conn.cursor()
-    cur.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT,
-            author TEXT,
-            genre TEXT,
-            purchase_date TEXT,
-            cost REAL,
-            audiobook_link TEXT,
-            status TEXT,
-            notes TEXT
+    with transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS books (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT,
+                author TEXT,
+                genre TEXT,
+                purchase_date TEXT,
+                cost REAL,
+                audiobook_link TEXT,
+                status TEXT,
+                notes TEXT
+            )
+        ''')
+        _init_search(conn)
+        _init_stats(conn)
+
+# ---------- Full-text search ----------
+# books_fts is an external-content FTS5 index over the text columns of
+# books, kept in sync by triggers so add/update/delete need no extra code.
+
+SEARCH_COLUMNS = ["title", "author", "genre", "notes"]
+# Set by init_db; False when this SQLite build has no FTS5
+fts_enabled = False
+
+FTS_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, genre, notes)
+        VALUES (new.id, new.title, new.author, new.genre, new.notes);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre, notes)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.notes);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre, notes)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.notes);
+        INSERT INTO books_fts(rowid, title, author, genre, notes)
+        VALUES (new.id, new.title, new.author, new.genre, new.notes);
+    END''',
+)
+
+def _init_search(conn):
+    global fts_enabled
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name='books_fts'").fetchone()
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts
+            USING fts5(title, author, genre, notes, content='books', content_rowid='id')
+        ''')
+    except sqlite3.OperationalError:
+        fts_enabled = False
+        return
+    for trigger in FTS_TRIGGERS:
+        conn.execute(trigger)
+    if not exists:
+        # Index books added before the search table existed
+        conn.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+    fts_enabled = True
+
+def _fts_query(text):
+    # Every word must match, as a prefix so results follow the user's typing
+    words = text.replace('"', " ").split()
+    return " ".join(f'"{word}"*' for word in words)
+
+@timed("db.search_books")
+@cached_query
+def search_books(query, limit=50, offset=0):
+    """
+        query: words to look for in title, author, genre or notes
+        limit: maximum rows to return, None for all
+        offset: rows to skip, for paging
+    """
+    conn = get_connection()
+    limit = -1 if limit is None else limit
+    match = _fts_query(query or "")
+    if not match:
+        return conn.execute("SELECT * FROM books ORDER BY id LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+    if fts_enabled:
+        return conn.execute('''
+            SELECT books.* FROM books_fts JOIN books ON books.id = books_fts.rowid
+            WHERE books_fts MATCH ? ORDER BY books_fts.rank LIMIT ? OFFSET ?
+        ''', (match, limit, offset)).fetchall()
+    # Without FTS5 fall back to a LIKE scan, still filtered inside SQLite
+    clauses, params = _filter_clause({"search": query})
+    return conn.execute(f"SELECT * FROM books WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ? OFFSET ?",
+                        (*params, limit, offset)).fetchall()
+
+# ---------- Summary statistics ----------
+# book_stats holds a book count and amount spent per status, genre and
+# purchase month. Triggers keep it current on every write, so the summary
+# never has to scan the books table.
+
+STATS_DIMENSIONS = {
+    "status": "coalesce({row}.status, '')",
+    "genre": "coalesce({row}.genre, '')",
+    "month": "coalesce(substr({row}.purchase_date, 1, 7), '')",
+}
+
+def _stats_upsert(row, sign):
+    return "".join(f'''
+        INSERT INTO book_stats (dimension, key, books, spent)
+        VALUES ('{dimension}', {key.format(row=row)}, {sign}1, {sign}coalesce({row}.cost, 0))
+        ON CONFLICT(dimension, key) DO UPDATE SET
+            books = books + excluded.books, spent = spent + excluded.spent;'''
+        for dimension, key in STATS_DIMENSIONS.items())
+
+def _init_stats(conn):
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name='book_stats'").fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS book_stats (
+            dimension TEXT,
+            key TEXT,
+            books INTEGER,
+            spent REAL,
+            PRIMARY KEY (dimension, key)
         )
     ''')
-    conn.commit()
-    conn.close()
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS book_stats_ai AFTER INSERT ON books BEGIN {_stats_upsert('new', '+')} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS book_stats_ad AFTER DELETE ON books BEGIN {_stats_upsert('old', '-')} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS book_stats_au AFTER UPDATE ON books BEGIN "
+                 f"{_stats_upsert('old', '-')} {_stats_upsert('new', '+')} END")
+    if not exists:
+        # Count books added before the stats table existed
+        for dimension, key in STATS_DIMENSIONS.items():
+            key = key.format(row="books")
+            conn.execute(f'''
+                INSERT INTO book_stats (dimension, key, books, spent)
+                SELECT '{dimension}', {key}, count(*), coalesce(sum(cost), 0) FROM books GROUP BY {key}
+            ''')
+
+@timed("db.get_summary")
+@cached_query
+def get_summary():
+    rows = get_connection().execute(
+        "SELECT key, books, spent FROM book_stats WHERE dimension = 'status'"
+    ).fetchall()
+    by_status = {key: books for key, books, _ in rows}
+    return {
+        "total_books": sum(books for _, books, _ in rows),
+        "completed": by_status.get("Completed", 0),
+        "to_read": by_status.get("To Read", 0),
+        "reading": by_status.get("Reading", 0),
+        "total_spent": sum(spent for _, _, spent in rows),
+    }
+
+@timed("db.get_breakdown")
+@cached_query
+def get_breakdown(dimension):
+    """Return [(key, books, spent)] for "status", "genre" or "month"."""
+    if dimension not in STATS_DIMENSIONS:
+        raise ValueError(f"unknown dimension {dimension!r}")
+    return get_connection().execute(
+        "SELECT key, books, spent FROM book_stats WHERE dimension = ? AND books > 0 ORDER BY key",
+        (dimension,)
+    ).fetchall()
 
+
+# ---------- Paging ----------
+
+PAGE_SIZE = 20
+
+def _filter_clause(filters):
+    """Turn {"search": ..., "status": ..., "genre": ...} into a WHERE fragment."""
+    clauses, params = [], []
+    filters = filters or {}
+    match = _fts_query(filters.get("search") or "")
+    if match:
+        if fts_enabled:
+            clauses.append("id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)")
+            params.append(match)
+        else:
+            for word in filters["search"].split():
+                clauses.append("(" + " OR ".join(f"{col} LIKE ?" for col in SEARCH_COLUMNS) + ")")
+                params.extend(f"%{word}%" for _ in SEARCH_COLUMNS)
+    for column in ("status", "genre"):
+        if filters.get(column):
+            clauses.append(f"{column} = ?")
+            params.append(filters[column])
+    return clauses, params
+
+@timed("db.get_books_page")
+@cached_query
+def get_books_page(after_id=0, limit=PAGE_SIZE, filters=None):
+    """
+        Keyset pagination: returns up to `limit` books with id greater than
+        after_id, in id order. Pass the id of the last row to get the next page.
+    """
+    clauses, params = _filter_clause(filters)
+    where = " AND ".join(["id > ?"] + clauses)
+    return get_connection().execute(
+        f"SELECT * FROM books WHERE {where} ORDER BY id LIMIT ?", (after_id, *params, limit)
+    ).fetchall()
+
+@timed("db.get_book")
+@cached_query
+def get_book(book_id):
+    return get_connection().execute("SELECT * FROM books WHERE id=?", (book_id,)).fetchone()
+
+@timed("db.add_book")
 def add_book(data):
-    conn = sqlite3.connect("books.db")
-    cur = conn.cursor()
-    cur.execute('''
-        INSERT INTO books (title, author, genre, purchase_date, cost, audiobook_link, status, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', data)
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute('''
+            INSERT INTO books (title, author, genre, purchase_date, cost, audiobook_link, status, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', data)
 
+@timed("db.get_books")
+@cached_query
 def get_books():
-    conn = sqlite3.connect("books.db")
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM books")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return get_connection().execute("SELECT * FROM books").fetchall()
 
+@timed("db.update_book")
 def update_book(book_id, updated_data):
-    conn = sqlite3.connect("books.db")
-    cur = conn.cursor()
-    cur.execute('''
-        UPDATE books SET title=?, author=?, genre=?, purchase_date=?, cost=?, audiobook_link=?, status=?, notes=?
-        WHERE id=?
-    ''', (*updated_data, book_id))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute('''
+            UPDATE books SET title=?, author=?, genre=?, purchase_date=?, cost=?, audiobook_link=?, status=?, notes=?
+            WHERE id=?
+        ''', (*updated_data, book_id))
 
+@timed("db.delete_book")
 def delete_book(book_id):
-    conn = sqlite3.connect("books.db")
-    cur = conn.cursor()
-    cur.execute("DELETE FROM books WHERE id=?", (book_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("DELETE FROM books WHERE id=?", (book_id,))
+
+
+# ---------- Bulk operations ----------
+# Each batch runs in one transaction and returns (count, errors) where
+# errors is a list of (index_in_batch, message) for the rows that were skipped.
+
+def _clean_date(value):
+    """ISO date string for a date, datetime or ISO text; None when empty."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return datetime.fromisoformat(str(value).strip()).date().isoformat()
+    except ValueError:
+        raise ValueError(f"invalid purchase date {value!r}, expected YYYY-MM-DD") from None
+
+def _clean_book(data):
+    if len(data) != len(BOOK_FIELDS):
+        raise ValueError(f"expected {len(BOOK_FIELDS)} fields, got {len(data)}")
+    title, author, genre, purchase_date, cost, link, status, notes = data
+    if not title or not author:
+        raise ValueError("title and author are required")
+    cost = float(cost or 0)
+    if cost < 0:
+        raise ValueError("cost must not be negative")
+    status = status or "To Read"
+    if status not in STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+    return (title, author, genre or "", _clean_date(purchase_date), cost, link or "", status, notes or "")
+
+def _run_many(sql, params):
+    """executemany, falling back to row by row to find the failing rows."""
+    with transaction() as conn:
+        conn.execute("SAVEPOINT bulk")
+        try:
+            conn.executemany(sql, [p for _, p in params])
+            conn.execute("RELEASE bulk")
+            return len(params), []
+        except sqlite3.Error:
+            conn.execute("ROLLBACK TO bulk")
+            conn.execute("RELEASE bulk")
+
+        count, errors = 0, []
+        for index, p in params:
+            try:
+                conn.execute(sql, p)
+                count += 1
+            except sqlite3.Error as e:
+                errors.append((index, str(e)))
+        return count, errors
+
+def _existing_ids(conn, book_ids):
+    found = set()
+    for start in range(0, len(book_ids), MAX_PARAMS):
+        chunk = book_ids[start:start + MAX_PARAMS]
+        placeholders = ",".join("?" * len(chunk))
+        found.update(row[0] for row in conn.execute(f"SELECT id FROM books WHERE id IN ({placeholders})", chunk))
+    return found
+
+@timed("db.add_books_many")
+def add_books_many(rows):
+    params, errors = [], []
+    for index, data in enumerate(rows):
+        try:
+            params.append((index, _clean_book(data)))
+        except (ValueError, TypeError) as e:
+            errors.append((index, str(e)))
+    count, db_errors = _run_many('''
+        INSERT INTO books (title, author, genre, purchase_date, cost, audiobook_link, status, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', params)
+    return count, sorted(errors + db_errors)
+
+@timed("db.update_books_many")
+def update_books_many(updates):
+    """updates: iterable of (book_id, updated_data)"""
+    updates = list(updates)
+    params, errors = [], []
+    with transaction() as conn:
+        existing = _existing_ids(conn, [book_id for book_id, _ in updates])
+        for index, (book_id, data) in enumerate(updates):
+            if book_id not in existing:
+                errors.append((index, f"no book with id {book_id}"))
+                continue
+            try:
+                params.append((index, (*_clean_book(data), book_id)))
+            except (ValueError, TypeError) as e:
+                errors.append((index, str(e)))
+        count, db_errors = _run_many('''
+            UPDATE books SET title=?, author=?, genre=?, purchase_date=?, cost=?, audiobook_link=?, status=?, notes=?
+            WHERE id=?
+        ''', params)
+    return count, sorted(errors + db_errors)
+
+@timed("db.delete_books_many")
+def delete_books_many(book_ids):
+    book_ids = list(book_ids)
+    count = 0
+    with transaction() as conn:
+        existing = _existing_ids(conn, book_ids)
+        errors = [(index, f"no book with id {book_id}")
+                  for index, book_id in enumerate(book_ids) if book_id not in existing]
+        for start in range(0, len(book_ids), MAX_PARAMS):
+            chunk = book_ids[start:start + MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            count += conn.execute(f"DELETE FROM books WHERE id IN ({placeholders})", chunk).rowcount
+    return count, errors
+
+
+# ---------- Import ----------
+
+# Column names accepted in import files, besides the database column names;
+# covers the headers of the app's own CSV export
+_IMPORT_ALIASES = {"audiobook": "audiobook_link", "link": "audiobook_link", "date": "purchase_date"}
+
+def _record_to_book(record):
+    fields = {}
+    for key, value in record.items():
+        key = str(key).strip().lower().replace(" ", "_")
+        fields[_IMPORT_ALIASES.get(key, key)] = value
+    return tuple(fields.get(name) for name in BOOK_FIELDS)
+
+def _read_records(file, fmt):
+    """Yield record dicts, or the ValueError for a record that can't be parsed."""
+    if fmt == "csv":
+        yield from csv.DictReader(file)
+    elif fmt == "jsonl":
+        for line in file:
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield ValueError(f"invalid JSON: {e}")
+                    continue
+                yield record if isinstance(record, dict) else ValueError("expected a JSON object")
+    else:
+        raise ValueError(f"unsupported import format {fmt!r}")
 
+@timed("db.import_books")
+def import_books(file, fmt="csv", chunk_size=IMPORT_CHUNK_SIZE):
+    """
+        file: open text file in CSV or JSON Lines format
+        fmt: "csv" or "jsonl"
+        Returns (rows imported, errors) with errors as (record number, message).
+    """
+    records = enumerate(_read_records(file, fmt), start=1)
+    imported, errors = 0, []
+    while True:
+        batch = list(islice(records, chunk_size))
+        if not batch:
+            break
+        numbers, chunk = [], []
+        for number, record in batch:
+            if isinstance(record, Exception):
+                errors.append((number, str(record)))
+            else:
+                numbers.append(number)
+                chunk.append(_record_to_book(record))
+        count, chunk_errors = add_books_many(chunk)
+        imported += count
+        errors.extend((numbers[index], message) for index, message in chunk_errors)
+    return imported, sorted(errors)
@@ -1,41 +1,84 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
 from datetime import datetime
 
+from storage import get_store, COLUMNS
+from progress import ProgressAggregator
+from deadlines import DeadlineIndex
+
+# metrics.py is shared with the other Financial Calculation tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics import timed, span, diagnostics_panel
+
 # ---------- CONFIG ----------
 DATA_FILE = 'gate_progress.csv'
 WEIGHT_FILE = 'subject_weights.csv'
+DB_FILE = 'gate_progress.db'
+# 'sqlite' keeps topics in DB_FILE (imported from the CSV files on first run);
+# 'csv' reads and writes the CSV files directly
+STORAGE_BACKEND = 'sqlite'
 SUBJECTS = ['Engineering Mathematics', 'Discrete Mathematics', 'Data Structure', 'Algorithms', 'Digital Logic', 'Computer Org', 
             'OS', 'DBMS', 'TOC', 'Compiler', 'CN', 'General Aptitude']
 
 # ---------- HELPERS ----------
+@st.cache_resource
+def get_topic_store():
+    if STORAGE_BACKEND == 'csv':
+        return get_store('csv', csv_file=DATA_FILE, weight_file=WEIGHT_FILE)
+    return get_store('sqlite', path=DB_FILE, csv_file=DATA_FILE, weight_file=WEIGHT_FILE)
+
+@timed("gate.load_data")
 def load_data():
-    if os.path.exists(DATA_FILE):
-        df = pd.read_csv(DATA_FILE, parse_dates=['Target Date'])
-    else:
-        df = pd.DataFrame(columns=['Subject', 'Topic', 'Completed', 'Target Date', 'Notes'])
-    return df
+    # The store keeps the frame between reruns and shares it; don't modify it
+    return get_topic_store().load_topics()
 
+@timed("gate.save_data")
 def save_data(df):
-    df.to_csv(DATA_FILE, index=False)
+    get_topic_store().replace_topics(df)
 
+@timed("gate.load_weights")
 def load_weights():
-    if os.path.exists(WEIGHT_FILE):
-        return pd.read_csv(WEIGHT_FILE, index_col='Subject')['Weight']
-    else:
+    weights = get_topic_store().load_weights()
+    if weights.empty:
         return pd.Series({s: 1 for s in SUBJECTS}, name='Weight')
+    return weights
 
+@timed("gate.save_weights")
 def save_weights(weights):
-    weights_df = weights.reset_index()
-    weights_df.columns = ['Subject', 'Weight']
-    weights_df.to_csv(WEIGHT_FILE, index=False)
-
-def get_weighted_progress(df, weights):
-    subject_completion = df.groupby('Subject')['Completed'].mean().fillna(0)
-    weighted_score = (subject_completion * weights).sum()
-    total_weight = weights.sum()
-    return round((weighted_score / total_weight) * 100, 2)
+    get_topic_store().save_weights(weights)
+
+@st.cache_resource
+def get_progress():
+    # Built once from the stored topics, then kept current by the writes below
+    return ProgressAggregator.from_frame(load_data(), load_weights())
+
+@st.cache_resource
+def get_deadlines():
+    return DeadlineIndex.from_frame(load_data())
+
+def _normalize_row(row):
+    row = {c: row.get(c) for c in COLUMNS}
+    row['Completed'] = bool(row['Completed']) if not pd.isna(row['Completed']) else False
+    row['Target Date'] = pd.to_datetime(row['Target Date']) if row['Target Date'] else pd.NaT
+    return row
+
+def collect_editor_changes(editor_state, view_df, full_df):
+    """Turn st.data_editor's edit state into (inserts, updates, deletes) for the store.
+
+    Row positions in the editor state refer to view_df; they are mapped
+    back to topic ids through its index.
+    """
+    deletes = [view_df.index[int(pos)] for pos in editor_state.get("deleted_rows", [])]
+    updates = {}
+    for pos, changes in editor_state.get("edited_rows", {}).items():
+        topic_id = view_df.index[int(pos)]
+        if topic_id not in deletes:
+            updates[topic_id] = _normalize_row({**full_df.loc[topic_id].to_dict(), **changes})
+    inserts = [_normalize_row(row) for row in editor_state.get("added_rows", [])
+               if row.get('Subject') or row.get('Topic')]
+    return inserts, updates, deletes
 
 # ---------- UI START ----------
 st.set_page_config("🎯 GATE Tracker", layout="wide")
@@ -50,16 +93,22 @@ selected_subjects = st.sidebar.multiselect("Filter by Subject", SUBJECTS, defaul
 status_filter = st.sidebar.radio("Status", ["All", "Completed", "Pending"])
 date_range = st.sidebar.date_input("Target Date Range", [])
 
-filtered_df = df[df['Subject'].isin(selected_subjects)]
+with span("gate.filter"):
+    if len(date_range) == 2:
+        # Binary search on the deadline index, which also applies the subject and status filters
+        start_date, end_date = pd.to_datetime(date_range)
+        filtered_df = df.loc[get_deadlines().in_range(start_date, end_date, selected_subjects, status_filter)]
+    else:
+        filtered_df = df[df['Subject'].isin(selected_subjects)]
 
-if status_filter == "Completed":
-    filtered_df = filtered_df[filtered_df['Completed'] == True]
-elif status_filter == "Pending":
-    filtered_df = filtered_df[filtered_df['Completed'] == False]
+        if status_filter == "Completed":
+            filtered_df = filtered_df[filtered_df['Completed'] == True]
+        elif status_filter == "Pending":
+            filtered_df = filtered_df[filtered_df['Completed'] == False]
 
-if len(date_range) == 2:
-    start_date, end_date = pd.to_datetime(date_range)
-    filtered_df = filtered_df[(df['Target Date'] >= start_date) & (df['Target Date'] <= end_date)]
+if st.sidebar.button("📄 Prepare CSV Export"):
+    st.sidebar.download_button("⬇️ Download CSV", data=get_topic_store().export_csv(),
+                               file_name=DATA_FILE, mime="text/csv")
 
 # ---------- TABS ----------
 tab1, tab2, tab3, tab4 = st.tabs(["➕ Add Topic", "📈 Progress", "📅 Deadlines", "⚖️ Set Subject Weights"])
@@ -76,37 +125,52 @@ with tab1:
         submitted = st.form_submit_button("Add Topic")
 
         if submitted:
-            new_row = pd.DataFrame({
-                'Subject': [subject],
-                'Topic': [topic],
-                'Completed': [completed],
-                'Target Date': [pd.to_datetime(target_date)],
-                'Notes': [notes]
-            })
-            df = pd.concat([df, new_row], ignore_index=True)
-            save_data(df)
+            new_row = {
+                'Subject': subject,
+                'Topic': topic,
+                'Completed': completed,
+                'Target Date': pd.to_datetime(target_date),
+                'Notes': notes
+            }
+            # Only the new row is written; the store adds it to its cached frame
+            topic_id = get_topic_store().add_topic(new_row)
+            df = load_data()
+            get_progress().add(subject, completed)
+            get_deadlines().add(topic_id, new_row['Target Date'], subject, completed)
             st.success(f"Added topic: {topic}")
 
 # ---------- TAB 2: Progress ----------
 with tab2:
     st.subheader("📊 Progress Overview")
 
-    weighted_progress = get_weighted_progress(df, weights)
+    progress = get_progress()
+    weighted_progress = progress.weighted_progress()
     st.metric("Weighted Progress", f"{weighted_progress:.2f}%")
     st.progress(weighted_progress / 100)
 
     for subject in SUBJECTS:
-        subject_df = df[df['Subject'] == subject]
-        if not subject_df.empty:
-            pct = subject_df['Completed'].mean() * 100
+        pct = progress.subject_progress(subject)
+        if pct is not None:
             st.write(f"**{subject}** - {pct:.1f}% complete")
             st.progress(pct / 100)
 
+    history = {subject: progress.subject_history(subject) for subject in SUBJECTS}
+    if any(history.values()):
+        with st.expander("📈 Progress History (all sessions since the server started)"):
+            # Long format: one row per point, so equal timestamps can't clash
+            history_df = pd.DataFrame(
+                [(time, subject, pct) for subject, points in history.items() for time, pct in points],
+                columns=['Time', 'Subject', 'Progress'])
+            st.line_chart(history_df, x='Time', y='Progress', color='Subject')
+
 # ---------- TAB 3: Calendar Deadlines ----------
 with tab3:
     st.subheader("📅 Upcoming Deadlines")
 
-    upcoming = df[df['Completed'] == False].sort_values("Target Date")
+    show_next = st.number_input("Show next", min_value=1, value=20, step=5)
+    # Earliest pending topics straight from the deadline heap, for the selected
+    # subjects; topics without a target date come last
+    upcoming = df.loc[get_deadlines().next_due(int(show_next), selected_subjects)]
     if not upcoming.empty:
         st.dataframe(upcoming[['Subject', 'Topic', 'Target Date']], use_container_width=True)
     else:
@@ -123,16 +187,46 @@ with tab4:
     if st.button("💾 Save Weights"):
         weights = pd.Series(weight_input)
         save_weights(weights)
+        get_progress().set_weights(weights)
         st.success("Weights updated successfully.")
 
 # ---------- Edit Table Below Tabs ----------
 st.markdown("### 📝 Edit Your Topics Below")
+if "saved_message" in st.session_state:
+    st.success(st.session_state.pop("saved_message"))
+# Bumped after every save so the editor starts again from the saved data
+editor_key = f"editor_{st.session_state.setdefault('editor_version', 0)}"
 if not filtered_df.empty:
-    edited_df = st.data_editor(filtered_df, num_rows="dynamic", key="editor")
+    with span("ui.data_editor"):
+        st.data_editor(filtered_df, num_rows="dynamic", key=editor_key)
     if st.button("Save Changes to Table"):
-        full_df = df.copy()
-        full_df.update(edited_df)
-        save_data(full_df)
-        st.success("Changes saved.")
+        # Only the rows the user touched are written, in one batch
+        inserts, updates, deletes = collect_editor_changes(st.session_state[editor_key], filtered_df, df)
+        store = get_topic_store()
+        with span("gate.apply_changes"):
+            new_ids = store.apply_changes(inserts, updates, deletes)
+
+        if store.stable_ids:
+            progress, deadlines = get_progress(), get_deadlines()
+            for topic_id, row in updates.items():
+                progress.update(df.at[topic_id, 'Subject'], df.at[topic_id, 'Completed'],
+                                row['Subject'], row['Completed'])
+                deadlines.update(topic_id, row['Target Date'], row['Subject'], row['Completed'])
+            for topic_id, row in zip(new_ids, inserts):
+                progress.add(row['Subject'], row['Completed'])
+                deadlines.add(topic_id, row['Target Date'], row['Subject'], row['Completed'])
+            for topic_id in deletes:
+                progress.remove(df.at[topic_id, 'Subject'], df.at[topic_id, 'Completed'])
+                deadlines.remove(topic_id)
+        else:
+            get_progress.clear()
+            get_deadlines.clear()
+
+        st.session_state.editor_version += 1
+        st.session_state.saved_message = (f"Changes saved: {len(inserts)} added, "
+                                          f"{len(updates)} updated, {len(deletes)} deleted.")
+        st.rerun()
 else:
     st.info("No topics to display with current filters.")
+
+diagnostics_panel(st.sidebar)
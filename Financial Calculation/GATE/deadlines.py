@@ -0,0 +1,136 @@
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+import pandas as pd
+
+
+class DeadlineIndex:
+    """Topics ordered by target date.
+
+    All dated topics sit in a list sorted by (date, id), so a date range is
+    two binary searches plus the matches. Pending topics are also kept in
+    a heap for "next N due"; entries for topics that were completed, edited
+    or deleted are left in the heap and skipped when met. Topics without a
+    target date are kept apart and come after the dated ones in next_due.
+    The app shares one index between all sessions, so every method holds
+    a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sorted = []
+        self._undated = []  # sorted ids
+        self._topics = {}   # id -> (date, subject, completed)
+        self._pending = []  # heap of (date, id, version)
+        self._versions = {}
+        self._stale = 0
+
+    @classmethod
+    def from_frame(cls, df):
+        index = cls()
+        for topic_id, subject, completed, target_date in zip(
+                df.index, df['Subject'], df['Completed'], df['Target Date']):
+            index._topics[topic_id] = (target_date, subject, bool(completed))
+            index._versions[topic_id] = 0
+        dated = [(date, topic_id) for topic_id, (date, _, _) in index._topics.items() if not pd.isna(date)]
+        index._sorted = sorted(dated)
+        index._undated = sorted(topic_id for topic_id, (date, _, _) in index._topics.items() if pd.isna(date))
+        index._pending = [(date, topic_id, 0) for date, topic_id in dated if not index._topics[topic_id][2]]
+        heapq.heapify(index._pending)
+        return index
+
+    def __len__(self):
+        return len(self._topics)
+
+    def add(self, topic_id, target_date, subject, completed):
+        with self._lock:
+            self._add(topic_id, target_date, subject, completed)
+
+    def remove(self, topic_id):
+        with self._lock:
+            self._remove(topic_id)
+
+    def update(self, topic_id, target_date, subject, completed):
+        with self._lock:
+            if topic_id in self._topics:
+                self._remove(topic_id)
+            self._add(topic_id, target_date, subject, completed)
+
+    def _add(self, topic_id, target_date, subject, completed):
+        self._topics[topic_id] = (target_date, subject, bool(completed))
+        version = self._versions.get(topic_id, -1) + 1
+        self._versions[topic_id] = version
+        if pd.isna(target_date):
+            insort(self._undated, topic_id)
+            return
+        insort(self._sorted, (target_date, topic_id))
+        if not completed:
+            heapq.heappush(self._pending, (target_date, topic_id, version))
+
+    def _remove(self, topic_id):
+        target_date, _, completed = self._topics.pop(topic_id)
+        self._versions[topic_id] += 1
+        if pd.isna(target_date):
+            del self._undated[bisect_left(self._undated, topic_id)]
+            return
+        i = bisect_left(self._sorted, (target_date, topic_id))
+        del self._sorted[i]
+        if not completed:
+            self._stale += 1
+            # Rebuild once most of the heap is dead entries
+            if self._stale > len(self._pending) // 2:
+                self._compact()
+
+    def _compact(self):
+        self._pending = [entry for entry in self._pending if self._is_current(entry)]
+        heapq.heapify(self._pending)
+        self._stale = 0
+
+    def _is_current(self, entry):
+        _, topic_id, version = entry
+        return self._versions.get(topic_id) == version and topic_id in self._topics
+
+    def _matches(self, topic_id, subjects, status):
+        _, subject, completed = self._topics[topic_id]
+        if subjects is not None and subject not in subjects:
+            return False
+        if status == "Completed":
+            return completed
+        if status == "Pending":
+            return not completed
+        return True
+
+    def in_range(self, start, end, subjects=None, status="All"):
+        """Ids of topics due between start and end (inclusive), in date order."""
+        subjects = set(subjects) if subjects is not None else None
+        with self._lock:
+            lo = bisect_left(self._sorted, (start,))
+            hi = bisect_right(self._sorted, (end, float('inf')))
+            return [topic_id for _, topic_id in self._sorted[lo:hi]
+                    if self._matches(topic_id, subjects, status)]
+
+    def next_due(self, n, subjects=None):
+        """Ids of the n pending topics with the earliest target dates.
+
+        Walks the heap as a tree from the root, so only about n entries
+        (plus skipped ones) are looked at and the heap is left untouched.
+        Pending topics without a target date fill the rest, by id.
+        """
+        subjects = set(subjects) if subjects is not None else None
+        result = []
+        with self._lock:
+            frontier = [(self._pending[0], 0)] if self._pending else []
+            while frontier and len(result) < n:
+                entry, i = heapq.heappop(frontier)
+                if self._is_current(entry) and self._matches(entry[1], subjects, "Pending"):
+                    result.append(entry[1])
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(self._pending):
+                        heapq.heappush(frontier, (self._pending[child], child))
+            for topic_id in self._undated:
+                if len(result) >= n:
+                    break
+                if self._matches(topic_id, subjects, "Pending"):
+                    result.append(topic_id)
+        return result
@@ -0,0 +1,107 @@
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+
+# Points of progress history kept per subject; the aggregator is shared by
+# every session for the life of the server
+HISTORY_LENGTH = 500
+
+
+def get_weighted_progress(df, weights):
+    subject_completion = df.groupby('Subject')['Completed'].mean().fillna(0)
+    weighted_score = (subject_completion * weights).sum()
+    total_weight = weights.sum()
+    return round((weighted_score / total_weight) * 100, 2)
+
+
+class ProgressAggregator:
+    """Per-subject completed/total counters with an O(1) weighted score.
+
+    Gives the same numbers as get_weighted_progress, but each
+    add, delete or toggle only touches the counters of one subject instead
+    of regrouping the whole frame. The app shares one aggregator between
+    all sessions, so every method holds a lock.
+    """
+
+    def __init__(self, weights):
+        self._lock = threading.Lock()
+        self.completed = defaultdict(int)
+        self.total = defaultdict(int)
+        # subject -> (timestamp, percent complete) after each of the last changes
+        self.history = defaultdict(lambda: deque(maxlen=HISTORY_LENGTH))
+        self._contribution = {}
+        self.set_weights(weights)
+
+    @classmethod
+    def from_frame(cls, df, weights):
+        agg = cls(weights)
+        counts = df.groupby('Subject')['Completed'].agg(['sum', 'count'])
+        for subject, (completed, total) in counts.iterrows():
+            agg.completed[subject] = int(completed)
+            agg.total[subject] = int(total)
+            agg._refresh(subject)
+        return agg
+
+    def set_weights(self, weights):
+        with self._lock:
+            self.weights = {subject: float(weight) for subject, weight in weights.items()}
+            self.total_weight = sum(self.weights.values())
+            self._contribution = {}
+            for subject in list(self.total):
+                self._refresh(subject)
+
+    def _refresh(self, subject):
+        # Subjects without a weight don't count, like the NaN rows skipped by pandas
+        contribution = 0.0
+        if self.total[subject] and subject in self.weights:
+            contribution = self.weights[subject] * self.completed[subject] / self.total[subject]
+        self._contribution[subject] = contribution
+
+    def _record(self, subject):
+        self._refresh(subject)
+        self.history[subject].append((datetime.now(), self._percent(subject) or 0.0))
+
+    def _percent(self, subject):
+        if not self.total.get(subject):
+            return None
+        return self.completed[subject] / self.total[subject] * 100
+
+    def add(self, subject, completed):
+        with self._lock:
+            self.total[subject] += 1
+            self.completed[subject] += bool(completed)
+            self._record(subject)
+
+    def remove(self, subject, completed):
+        with self._lock:
+            self.total[subject] -= 1
+            self.completed[subject] -= bool(completed)
+            self._record(subject)
+
+    def update(self, old_subject, old_completed, new_subject, new_completed):
+        if old_subject == new_subject and bool(old_completed) == bool(new_completed):
+            return
+        with self._lock:
+            self.total[old_subject] -= 1
+            self.completed[old_subject] -= bool(old_completed)
+            self.total[new_subject] += 1
+            self.completed[new_subject] += bool(new_completed)
+            self._record(old_subject)
+            if new_subject != old_subject:
+                self._record(new_subject)
+
+    def subject_progress(self, subject):
+        """Percent complete for one subject, or None if it has no topics."""
+        with self._lock:
+            return self._percent(subject)
+
+    def weighted_progress(self):
+        with self._lock:
+            if not self.total_weight:
+                return 0.0
+            # One term per subject, so this stays constant-time as topics grow
+            return round((sum(self._contribution.values()) / self.total_weight) * 100, 2)
+
+    def subject_history(self, subject):
+        with self._lock:
+            return list(self.history.get(subject, ()))
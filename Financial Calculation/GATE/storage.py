@@ -0,0 +1,281 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+# Storage backends for the GATE tracker. Both expose the same methods, so
+# app.py only talks to get_store(). Topics carry a stable integer id (the
+# DataFrame index) that row-level updates and deletes refer to.
+#
+# load_topics() keeps the frame it returns and hands the same one out until
+# the data changes, so a Streamlit rerun doesn't read the whole table.
+# Writes made through the store build the next frame from the previous one
+# plus the rows they touched; the frames returned are shared and must not be
+# modified by the caller.
+
+COLUMNS = ['Subject', 'Topic', 'Completed', 'Target Date', 'Notes']
+DB_COLUMNS = ['subject', 'topic', 'completed', 'target_date', 'notes']
+
+
+def _empty_topics():
+    df = pd.DataFrame(columns=COLUMNS)
+    df['Target Date'] = pd.to_datetime(df['Target Date'])
+    return df
+
+
+def _with_changes(df, inserts=(), new_ids=(), updates=None, deletes=()):
+    """A copy of df with the rows written by add_topic/apply_changes."""
+    df = df.drop(index=[topic_id for topic_id in deletes if topic_id in df.index])
+    for topic_id, row in (updates or {}).items():
+        if topic_id in df.index:
+            df.loc[topic_id, COLUMNS] = [row.get(c) for c in COLUMNS]
+    if inserts:
+        added = pd.DataFrame([{c: row.get(c) for c in COLUMNS} for row in inserts],
+                             index=list(new_ids), columns=COLUMNS)
+        added['Completed'] = added['Completed'].fillna(False).astype(bool)
+        added['Target Date'] = pd.to_datetime(added['Target Date'])
+        df = added if df.empty else pd.concat([df, added])
+    return df
+
+
+def _to_db_row(row):
+    target_date = row.get('Target Date')
+    if target_date is None or pd.isna(target_date):
+        target_date = None
+    else:
+        target_date = pd.Timestamp(target_date).strftime('%Y-%m-%d')
+    notes = row.get('Notes')
+    return (row.get('Subject'), row.get('Topic'), bool(row.get('Completed')), target_date,
+            None if notes is None or pd.isna(notes) else notes)
+
+
+class SqliteStore:
+    """Topics and weights in SQLite: adds and edits touch a single row."""
+
+    # Topic ids survive other rows being deleted
+    stable_ids = True
+
+    def __init__(self, path='gate_progress.db', csv_file=None, weight_file=None):
+        self.path = path
+        # One connection shared by every Streamlit session, used under a lock
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._frame = None
+        self._frame_version = None
+        created = not self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name='topics'").fetchone()
+        with self.lock, self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS topics (
+                    id INTEGER PRIMARY KEY,
+                    subject TEXT,
+                    topic TEXT,
+                    completed INTEGER,
+                    target_date TEXT,
+                    notes TEXT
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS weights (
+                    subject TEXT PRIMARY KEY,
+                    weight INTEGER
+                )
+            ''')
+        # First run: bring over the existing CSV files
+        if created:
+            if csv_file and os.path.exists(csv_file):
+                self.import_csv(csv_file)
+            if weight_file and os.path.exists(weight_file):
+                self.save_weights(pd.read_csv(weight_file, index_col='Subject')['Weight'])
+
+    # ---------- Topics ----------
+    def load_topics(self):
+        with self.lock:
+            # data_version only changes when another connection commits
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._frame is None or version != self._frame_version:
+                self._frame = self._read_topics()
+                self._frame_version = version
+            return self._frame
+
+    def clear_cache(self):
+        with self.lock:
+            self._frame = None
+
+    def _read_topics(self):
+        rows = self.conn.execute(f"SELECT id, {', '.join(DB_COLUMNS)} FROM topics ORDER BY id").fetchall()
+        if not rows:
+            return _empty_topics()
+        df = pd.DataFrame.from_records(rows, columns=['id'] + COLUMNS, index='id')
+        df.index.name = None
+        df['Completed'] = df['Completed'].astype(bool)
+        df['Target Date'] = pd.to_datetime(df['Target Date'], format='%Y-%m-%d')
+        return df
+
+    def add_topic(self, row):
+        with self.lock, self.conn:
+            cur = self.conn.execute(
+                f"INSERT INTO topics ({', '.join(DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", _to_db_row(row))
+            self._changed([row], [cur.lastrowid])
+        return cur.lastrowid
+
+    def update_topic(self, topic_id, row):
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"UPDATE topics SET {', '.join(c + '=?' for c in DB_COLUMNS)} WHERE id=?",
+                (*_to_db_row(row), int(topic_id)))
+            self._changed(updates={topic_id: row})
+
+    def delete_topic(self, topic_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM topics WHERE id=?", (int(topic_id),))
+            self._changed(deletes=[topic_id])
+
+    def apply_changes(self, inserts, updates, deletes):
+        """
+            inserts: list of row dicts to add
+            updates: {topic_id: row dict} of full replacement rows
+            deletes: topic ids to remove
+            All three are written in one transaction. Returns the new ids.
+        """
+        with self.lock, self.conn:
+            new_ids = [self.conn.execute(
+                f"INSERT INTO topics ({', '.join(DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", _to_db_row(row)).lastrowid
+                for row in inserts]
+            self.conn.executemany(
+                f"UPDATE topics SET {', '.join(c + '=?' for c in DB_COLUMNS)} WHERE id=?",
+                [(*_to_db_row(row), int(topic_id)) for topic_id, row in updates.items()])
+            self.conn.executemany("DELETE FROM topics WHERE id=?", [(int(topic_id),) for topic_id in deletes])
+            self._changed(inserts, new_ids, updates, deletes)
+        return new_ids
+
+    def _changed(self, inserts=(), new_ids=(), updates=None, deletes=()):
+        # Called under the lock, so no other write lands between the two
+        if self._frame is not None:
+            self._frame = _with_changes(self._frame, inserts, new_ids, updates, deletes)
+
+    def replace_topics(self, df):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM topics")
+            self.conn.executemany(
+                f"INSERT INTO topics ({', '.join(DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                (_to_db_row(row) for row in df.to_dict('records')))
+            self._frame = None
+
+    # ---------- Weights ----------
+    def load_weights(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT subject, weight FROM weights").fetchall()
+        return pd.Series(dict(rows), name='Weight', dtype='int64')
+
+    def save_weights(self, weights):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO weights (subject, weight) VALUES (?, ?)",
+                [(subject, int(weight)) for subject, weight in weights.items()])
+
+    # ---------- CSV import / export ----------
+    def import_csv(self, csv_file):
+        df = pd.read_csv(csv_file, parse_dates=['Target Date'])
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO topics ({', '.join(DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                (_to_db_row(row) for row in df.to_dict('records')))
+            self._frame = None
+        return len(df)
+
+    def export_csv(self, csv_file=None):
+        """Write the topics in the original CSV layout; returns the CSV text when no file is given."""
+        return self.load_topics()[COLUMNS].to_csv(csv_file, index=False, date_format='%Y-%m-%d')
+
+
+class CsvStore:
+    """The original single-file CSV layout. Adds append one line; edits rewrite the file."""
+
+    # Ids are row positions, so deleting a row renumbers the ones after it
+    stable_ids = False
+
+    def __init__(self, csv_file='gate_progress.csv', weight_file='subject_weights.csv'):
+        self.csv_file = csv_file
+        self.weight_file = weight_file
+        self._frame = None
+        self._frame_mtime = None
+
+    def _mtime(self):
+        return os.path.getmtime(self.csv_file) if os.path.exists(self.csv_file) else None
+
+    def load_topics(self):
+        # Read again only when the file changed behind our back
+        mtime = self._mtime()
+        if self._frame is None or mtime != self._frame_mtime:
+            if mtime is not None:
+                self._frame = pd.read_csv(self.csv_file, parse_dates=['Target Date'])
+            else:
+                self._frame = _empty_topics()
+            self._frame_mtime = mtime
+        return self._frame
+
+    def clear_cache(self):
+        self._frame = None
+
+    def add_topic(self, row):
+        df = self.load_topics()
+        topic_id = len(df)
+        # load_topics just checked whether the file exists
+        pd.DataFrame([row], columns=COLUMNS).to_csv(
+            self.csv_file, mode='a', header=self._frame_mtime is None, index=False, date_format='%Y-%m-%d')
+        self._frame = _with_changes(df, [row], [topic_id])
+        self._frame_mtime = self._mtime()
+        return topic_id
+
+    def update_topic(self, topic_id, row):
+        df = self.load_topics().copy()
+        df.loc[topic_id, COLUMNS] = [row.get(c) for c in COLUMNS]
+        self.replace_topics(df)
+
+    def delete_topic(self, topic_id):
+        self.replace_topics(self.load_topics().drop(index=topic_id))
+
+    def apply_changes(self, inserts, updates, deletes):
+        df = self.load_topics().copy()
+        for topic_id, row in updates.items():
+            df.loc[topic_id, COLUMNS] = [row.get(c) for c in COLUMNS]
+        # Ids are positions in the rewritten file, so count after the deletes
+        df = df.drop(index=list(deletes))
+        new_ids = list(range(len(df), len(df) + len(inserts)))
+        if inserts:
+            df = pd.concat([df, pd.DataFrame(inserts, columns=COLUMNS)], ignore_index=True)
+        self.replace_topics(df)
+        return new_ids
+
+    def replace_topics(self, df):
+        df[COLUMNS].to_csv(self.csv_file, index=False, date_format='%Y-%m-%d')
+        # Edits rewrite the whole file anyway; the next load reads it back
+        self._frame = None
+
+    def load_weights(self):
+        if os.path.exists(self.weight_file):
+            return pd.read_csv(self.weight_file, index_col='Subject')['Weight']
+        return pd.Series(dtype='int64', name='Weight')
+
+    def save_weights(self, weights):
+        weights_df = weights.reset_index()
+        weights_df.columns = ['Subject', 'Weight']
+        weights_df.to_csv(self.weight_file, index=False)
+
+    def import_csv(self, csv_file):
+        new_rows = pd.read_csv(csv_file, parse_dates=['Target Date'])
+        self.replace_topics(pd.concat([self.load_topics(), new_rows], ignore_index=True))
+        return len(new_rows)
+
+    def export_csv(self, csv_file=None):
+        return self.load_topics()[COLUMNS].to_csv(csv_file, index=False, date_format='%Y-%m-%d')
+
+
+BACKENDS = {'sqlite': SqliteStore, 'csv': CsvStore}
+
+
+def get_store(backend='sqlite', **kwargs):
+    return BACKENDS[backend](**kwargs)
@@ -1,13 +1,162 @@
+import argparse
+import sys
+
+DAYS_PER_YEAR = 365.25
+CHUNK_SIZE = 1_000_000
+
+
 def cagr(final, begin, duration):
     """
-        final:
-        begin:
-        duration:
+        final: value at the end
+        begin: value at the start
+        duration: number of years in between
     """
     return (final/begin)**(1/duration) - 1
 
-final = int(input("Enter the final of Return: "))
-begin = int(input("Enter the initial amount: "))
-duration = int(input("Enter the number of invested years: "))
 
-print(round(cagr(final, begin, duration)*100, 2))
\ No newline at end of file
+def cagr_array(final, begin, duration):
+    """Vectorized cagr: each argument may be a scalar or an array; they are broadcast together."""
+    import numpy as np
+
+    final = np.asarray(final, dtype=float)
+    begin = np.asarray(begin, dtype=float)
+    duration = np.asarray(duration, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (final / begin) ** (1 / duration) - 1
+
+
+def cagr_from_prices(prices, dates):
+    """
+        prices: 1-D price series, or 2-D array with one row per instrument
+        dates: dates of the price columns (anything numpy can read as datetime64)
+        Duration is the day count between the first and last date, in years.
+    """
+    import numpy as np
+
+    prices = np.asarray(prices, dtype=float)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    years = (dates[-1] - dates[0]).astype(float) / DAYS_PER_YEAR
+    return cagr_array(prices[..., -1], prices[..., 0], years)
+
+
+def rolling_cagr(prices, dates, years):
+    """
+        CAGR of every `years`-long window in a price history, one per start date.
+        prices: 1-D price series
+        dates: matching dates, sorted; gaps and irregular spacing are fine
+        years: window length in years
+        Each window ends at the first date at least `years` after its start,
+        and its duration is the actual day count between the two dates.
+        Returns (start_dates, end_dates, cagr) arrays for the starts that have
+        a full window.
+    """
+    import numpy as np
+
+    prices = np.asarray(prices, dtype=float)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    # Prefix sums of log returns: the return of any window is one subtraction
+    log_growth = np.concatenate(([0.0], np.cumsum(np.diff(np.log(prices)))))
+
+    window = np.timedelta64(round(years * DAYS_PER_YEAR), "D")
+    ends = np.searchsorted(dates, dates + window, side="left")
+    valid = ends < len(dates)
+    starts = np.flatnonzero(valid)
+    ends = ends[valid]
+
+    durations = (dates[ends] - dates[starts]).astype(float) / DAYS_PER_YEAR
+    growth = np.exp((log_growth[ends] - log_growth[starts]) / durations) - 1
+    return dates[starts], dates[ends], growth
+
+
+def cagr_summary(values, percentiles=(5, 25, 75, 95)):
+    """Summary statistics of an array of CAGR values, ignoring NaNs."""
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"count": 0}
+    summary = {
+        "count": int(values.size),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+        "median": float(np.median(values)),
+    }
+    for p, value in zip(percentiles, np.percentile(values, percentiles)):
+        summary[f"p{p}"] = float(value)
+    return summary
+
+
+def _csv_chunks(path, chunk_size):
+    import pandas as pd
+
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        yield chunk
+
+
+def _npy_chunks(path, chunk_size):
+    # Memory-mapped (n, 3) array of begin, final, years: only the slice
+    # being processed is read from disk
+    import numpy as np
+    import pandas as pd
+
+    data = np.load(path, mmap_mode="r")
+    for start in range(0, len(data), chunk_size):
+        block = np.asarray(data[start:start + chunk_size])
+        yield pd.DataFrame({
+            "id": np.arange(start, start + len(block)),
+            "begin": block[:, 0],
+            "final": block[:, 1],
+            "years": block[:, 2],
+        })
+
+
+def run_batch(input_path, output_path, chunk_size=CHUNK_SIZE):
+    """
+        Compute CAGR for every instrument in input_path and write them to output_path.
+        input_path: CSV with begin, final and years columns (other columns such as
+                    an id are copied through), or a .npy file of shape (n, 3)
+        Rows are processed chunk_size at a time. Returns the number of rows.
+    """
+    chunks = _npy_chunks if input_path.endswith(".npy") else _csv_chunks
+    rows = 0
+    for i, chunk in enumerate(chunks(input_path, chunk_size)):
+        chunk["cagr"] = cagr_array(chunk["final"].to_numpy(), chunk["begin"].to_numpy(), chunk["years"].to_numpy())
+        chunk.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compound annual growth rate calculator")
+    parser.add_argument("input", nargs="?", help="CSV (begin, final, years columns) or .npy file to process")
+    parser.add_argument("-o", "--output", default="cagr_results.csv", help="where to write the results")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows processed at a time")
+    parser.add_argument("--rolling", type=float, metavar="YEARS",
+                        help="treat input as a price history (date, price columns) and summarise rolling CAGR")
+    args = parser.parse_args(argv)
+
+    if args.input and args.rolling:
+        import pandas as pd
+
+        history = pd.read_csv(args.input)
+        _, _, values = rolling_cagr(history.iloc[:, 1].to_numpy(), history.iloc[:, 0].to_numpy(), args.rolling)
+        for name, value in cagr_summary(values).items():
+            print(f"{name}: {value if name == 'count' else round(value * 100, 2)}")
+        return
+
+    if args.input:
+        rows = run_batch(args.input, args.output, args.chunk_size)
+        print(f"Wrote CAGR for {rows} rows to {args.output}")
+        return
+
+    final = int(input("Enter the final of Return: "))
+    begin = int(input("Enter the initial amount: "))
+    duration = int(input("Enter the number of invested years: "))
+
+    print(round(cagr(final, begin, duration)*100, 2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
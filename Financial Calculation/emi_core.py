@@ -0,0 +1,60 @@
+# Constant-time EMI quotes for the education loan calculators.
+#
+# During the education period every month does P = P + P*r - partial_payment,
+# whether the payment covers the interest or not, so the principal at the
+# end of the period has a closed form and does not need a loop.
+# Per-month rows are only produced on demand by the generators below.
+
+
+def monthly_rate(annual_rate):
+    return annual_rate / (12 * 100)
+
+
+def principal_after_education(P, r, edu_months, partial_payment):
+    """
+        P: principal at the start of the education period
+        r: monthly interest rate
+        edu_months: number of months in the education period
+        partial_payment: amount paid every month during the education period
+    """
+    if r == 0:
+        return P - partial_payment * edu_months
+    growth = (1 + r) ** edu_months
+    return P * growth - partial_payment * (growth - 1) / r
+
+
+def emi(P, r, n):
+    if r == 0:
+        return P / n
+    growth = (1 + r) ** n
+    return P * r * growth / (growth - 1)
+
+
+def quote(P, annual_rate, edu_months, repay_months, partial_payment):
+    """Return (principal after education, EMI) without building a schedule."""
+    r = monthly_rate(annual_rate)
+    final_principal = principal_after_education(P, r, edu_months, partial_payment)
+    return final_principal, emi(final_principal, r, repay_months)
+
+
+def education_schedule(P, r, edu_months, partial_payment):
+    """Yield (month, interest, principal_reduction, balance) for each education month."""
+    for month in range(1, edu_months + 1):
+        interest = P * r
+        if partial_payment >= interest:
+            principal_reduction = partial_payment - interest
+            P -= principal_reduction
+        else:
+            principal_reduction = 0.0
+            P += interest - partial_payment
+        yield month, interest, principal_reduction, P
+
+
+def repayment_schedule(P, r, n, emi_amount):
+    """Yield (month, principal, interest, balance) for each repayment month."""
+    balance = P
+    for month in range(1, n + 1):
+        interest = balance * r
+        principal = emi_amount - interest
+        balance -= principal
+        yield month, principal, interest, balance
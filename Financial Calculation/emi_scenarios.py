@@ -0,0 +1,189 @@
+import heapq
+import math
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from emi_core import monthly_rate, principal_after_education, emi
+from emi_engine import batch_emi
+
+# What-if analysis for the education loan calculators.
+#
+# sweep() prices every combination of principal x rate x repayment months x
+# education months x partial payment, split into blocks that run on a
+# process pool. Each block only receives the axes and an index range, so
+# the grid itself is never built or pickled in full. rank() then picks the
+# best scenarios by EMI or interest; best_scenarios() does both without
+# keeping the whole grid.
+#
+# solve_partial_payment() and solve_tenure() answer "what gets the EMI under
+# X?" directly instead of sweeping.
+
+BLOCK_SIZE = 1_000_000
+# Smaller grids are priced in this process: starting workers costs more
+SERIAL_LIMIT = 2_000_000
+AXES = ["principal", "annual_rate", "repay_months", "edu_months", "partial_payment"]
+RANK_KEYS = ["total_interest", "emi", "total_paid", "final_principal"]
+
+Scenario = namedtuple("Scenario", AXES + RANK_KEYS)
+SweepResult = namedtuple("SweepResult", ["axes", "final_principal", "emi", "total_interest", "total_paid"])
+
+
+def _axes(principal, annual_rates, repay_months, edu_months, partial_payments):
+    return tuple(np.atleast_1d(np.asarray(values, dtype=dtype)) for values, dtype in zip(
+        (principal, annual_rates, repay_months, edu_months, partial_payments),
+        (float, float, np.int64, np.int64, float)))
+
+
+def _blocks(axes, block_size):
+    size = math.prod(len(axis) for axis in axes)
+    return [(start, min(start + block_size, size)) for start in range(0, size, block_size)]
+
+
+def _map_blocks(func, axes, blocks, workers, *args):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(blocks) <= 1 or blocks[-1][1] <= SERIAL_LIMIT:
+        return [func(axes, start, stop, *args) for start, stop in blocks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(func, axes, start, stop, *args) for start, stop in blocks]
+        return [job.result() for job in jobs]
+
+
+def _evaluate_block(axes, start, stop):
+    index = np.unravel_index(np.arange(start, stop), tuple(len(axis) for axis in axes))
+    P, rate, n, edu, pp = (axis[i] for axis, i in zip(axes, index))
+    result = batch_emi(P, rate, edu, n, pp)
+    # Everything paid over both periods, minus what was borrowed
+    total_paid = pp * edu + result.emi * n
+    return SweepResult(axes, result.final_principal, result.emi, total_paid - P, total_paid)
+
+
+def _scenarios(result, by, top, max_emi, offset=0):
+    values = getattr(result, by).copy()
+    values[np.isnan(values) | (result.final_principal < 0)] = np.inf
+    if max_emi is not None:
+        values[~(result.emi <= max_emi)] = np.inf
+    top = min(top, int(np.isfinite(values).sum()))
+    if top == 0:
+        return []
+    # Partial sort: only the top entries are ordered
+    best = np.argpartition(values, top - 1)[:top]
+    best = best[np.argsort(values[best], kind="stable")]
+
+    index = np.unravel_index(best + offset, tuple(len(axis) for axis in result.axes))
+    inputs = [axis[i] for axis, i in zip(result.axes, index)]
+    return [Scenario(*(v.item() for v in row)) for row in zip(
+        *inputs, result.total_interest[best], result.emi[best], result.total_paid[best], result.final_principal[best])]
+
+
+def _best_in_block(axes, start, stop, by, top, max_emi):
+    return _scenarios(_evaluate_block(axes, start, stop), by, top, max_emi, offset=start)
+
+
+def sweep(principal, annual_rates, repay_months, edu_months, partial_payments, workers=None, block_size=BLOCK_SIZE):
+    """
+        Every argument is a value or a sequence of values to try.
+        workers: processes to use (default: one per core); 1 prices the grid here
+        Returns a SweepResult with one entry per combination, in the order of
+        itertools.product over the arguments. total_interest covers both the
+        education and the repayment period.
+        The whole grid is returned: for very large grids use best_scenarios.
+    """
+    axes = _axes(principal, annual_rates, repay_months, edu_months, partial_payments)
+    parts = _map_blocks(_evaluate_block, axes, _blocks(axes, block_size), workers)
+    if not parts:
+        empty = np.empty(0)
+        return SweepResult(axes, empty, empty, empty, empty)
+    return SweepResult(axes, *(np.concatenate(column) for column in list(zip(*parts))[1:]))
+
+
+def rank(result, by="total_interest", top=10, max_emi=None):
+    """
+        The top scenarios of a sweep, lowest first.
+        by: one of RANK_KEYS
+        max_emi: only consider scenarios whose EMI is at most this
+        Scenarios whose partial payments clear the loan before repayment starts
+        (negative principal after education) are left out.
+    """
+    return _scenarios(result, by, top, max_emi)
+
+
+def best_scenarios(principal, annual_rates, repay_months, edu_months, partial_payments,
+                   by="total_interest", top=10, max_emi=None, workers=None, block_size=BLOCK_SIZE):
+    """
+        sweep followed by rank, but every block is ranked in its worker and only
+        its top scenarios come back, so memory stays bounded by the block size.
+    """
+    axes = _axes(principal, annual_rates, repay_months, edu_months, partial_payments)
+    parts = _map_blocks(_best_in_block, axes, _blocks(axes, block_size), workers, by, top, max_emi)
+    return heapq.nsmallest(top, (scenario for part in parts for scenario in part),
+                           key=lambda scenario: getattr(scenario, by))
+
+
+def solve_partial_payment(target_emi, P, annual_rate, edu_months, repay_months):
+    """
+        Smallest monthly partial payment during the education period that brings
+        the EMI down to target_emi. Returns 0.0 if no payment is needed and
+        None if partial payments can't help (no education period).
+    """
+    r = monthly_rate(annual_rate)
+    # The principal after education, and so the EMI, falls linearly with the
+    # partial payment: solve the line through pp = 0 and pp = 1 exactly
+    emi_unpaid = emi(principal_after_education(P, r, edu_months, 0), r, repay_months)
+    emi_per_unit = emi_unpaid - emi(principal_after_education(P, r, edu_months, 1), r, repay_months)
+    if emi_unpaid <= target_emi:
+        return 0.0
+    if emi_per_unit <= 0:
+        return None  # No education period: partial payments don't change the EMI
+    return (emi_unpaid - target_emi) / emi_per_unit
+
+
+def solve_tenure(target_emi, P, annual_rate, edu_months, partial_payment, max_months=600):
+    """
+        Fewest repayment months whose EMI is at most target_emi, found by
+        bisection (the EMI falls as the tenure grows). None if even max_months
+        is not enough.
+    """
+    r = monthly_rate(annual_rate)
+    final_principal = principal_after_education(P, r, edu_months, partial_payment)
+    if emi(final_principal, r, max_months) > target_emi:
+        return None
+    lo, hi = 1, max_months
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if emi(final_principal, r, mid) <= target_emi:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+# Example usage:
+if __name__ == "__main__":
+    start = time.perf_counter()
+    result = sweep(
+        principal=1_000_000,
+        annual_rates=np.arange(6, 14.01, 0.05),
+        repay_months=range(60, 361, 6),
+        edu_months=range(12, 61, 6),
+        partial_payments=range(0, 20_001, 250),
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Priced {len(result.emi)} scenarios in {elapsed:.3f}s")
+    for scenario in rank(result, by="total_interest", top=5, max_emi=15_000):
+        print(scenario)
+
+    start = time.perf_counter()
+    best = best_scenarios(1_000_000, np.arange(6, 14.01, 0.01), range(60, 361), range(0, 61, 6),
+                          range(0, 20_001, 500), by="emi", top=3)
+    print(f"Searched the 108M-scenario grid in {time.perf_counter() - start:.3f}s:")
+    for scenario in best:
+        print(scenario)
+
+    pp = solve_partial_payment(15_000, 1_000_000, 9.5, 48, 120)
+    print(f"Partial payment for an EMI of 15000 over 120 months: {pp:.2f}")
+    months = solve_tenure(15_000, 1_000_000, 9.5, 48, 5_000)
+    print(f"Repayment months for an EMI of at most 15000 with 5000/month during education: {months}")
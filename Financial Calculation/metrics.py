@@ -0,0 +1,211 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+# Timing spans and counters shared by the Financial Calculation tools.
+#
+#     METRICS=1 streamlit run app.py          # record timings
+#     METRICS=1 METRICS_PROFILE=1 python ...  # also run every outermost span under cProfile
+#
+# Timings are kept in memory for snapshot() (the diagnostics panels) and
+# appended as JSON lines to METRICS_FILE, rotated at MAX_BYTES. While
+# disabled, a timed function costs one flag check on top of the call.
+
+METRICS_FILE = os.environ.get("METRICS_FILE", "metrics.log")
+MAX_BYTES = 1_000_000
+BACKUP_COUNT = 3
+
+_enabled = False
+_profiling = False
+_lock = threading.Lock()
+_spans = {}      # name -> [count, total seconds, max seconds]
+_counters = {}
+_profile_stats = None
+# Held by the thread being profiled: newer Pythons allow one profiler per process
+_profile_lock = threading.Lock()
+_local = threading.local()
+_logger = None
+
+
+def _get_logger(path):
+    logger = logging.getLogger("metrics")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    handler = RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+
+def enable(profile=False, metrics_file=None):
+    """Start recording; metrics_file=False keeps the timings in memory only."""
+    global _enabled, _profiling, _logger
+    if metrics_file is not False:
+        _logger = _get_logger(metrics_file or METRICS_FILE)
+    _profiling = profile
+    _enabled = True
+
+
+def disable():
+    global _enabled, _profiling
+    _enabled = False
+    _profiling = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def is_profiling():
+    return _profiling
+
+
+def _record(name, elapsed):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            _spans[name] = [1, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+    if _logger is not None:
+        _logger.info(json.dumps({"time": round(time.time(), 3), "span": name, "ms": round(elapsed * 1000, 3),
+                                 "thread": threading.current_thread().name}))
+
+
+def _run(name, func, args, kwargs):
+    depth = getattr(_local, "depth", 0)
+    profiler = None
+    if _profiling and depth == 0 and _profile_lock.acquire(blocking=False):
+        # Only outermost spans are profiled, and only one at a time
+        profiler = cProfile.Profile()
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            return profiler.runcall(func, *args, **kwargs)
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.depth = depth
+        _record(name, elapsed)
+        if profiler is not None:
+            _add_profile(profiler)
+            _profile_lock.release()
+
+
+def _add_profile(profiler):
+    global _profile_stats
+    with _lock:
+        if _profile_stats is None:
+            _profile_stats = pstats.Stats(profiler)
+        else:
+            _profile_stats.add(profiler)
+
+
+def timed(name=None):
+    """Decorator recording every call of the function as a span (named after the function by default)."""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            return _run(span_name, func, args, kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def span(name):
+    """Time a block of code; it is not profiled on its own, only as part of a timed function."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def count(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    """{"spans": {name: {count, total_ms, mean_ms, max_ms}}, "counters": {name: value}}"""
+    with _lock:
+        spans = {name: {"count": c, "total_ms": total * 1000, "mean_ms": total / c * 1000, "max_ms": longest * 1000}
+                 for name, (c, total, longest) in _spans.items()}
+        return {"spans": spans, "counters": dict(_counters)}
+
+
+def profile_report(limit=25, sort="cumulative"):
+    """Text of the top functions seen in profile mode, or "" if nothing was profiled."""
+    with _lock:
+        if _profile_stats is None:
+            return ""
+        out = io.StringIO()
+        _profile_stats.stream = out
+        _profile_stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def reset():
+    global _profile_stats
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _profile_stats = None
+
+
+def diagnostics_panel(st):
+    """Render the metrics with Streamlit; st is the streamlit module or a container such as st.sidebar.
+
+    Recording is process-wide, so the panel shows the shared state and only
+    changes it through explicit Start/Stop buttons. Call it at the end of the
+    script so the timings of the current run are included.
+    """
+    panel = st.expander("🩺 Diagnostics")
+    if _enabled:
+        panel.caption("Recording timings" + (" with cProfile" if _profiling else "") + " for every session.")
+        panel.button("⏹ Stop recording", key="metrics_stop", on_click=disable)
+    else:
+        profile = panel.checkbox("Profile with cProfile", key="metrics_profile")
+        panel.button("▶ Start recording", key="metrics_start", on_click=enable, kwargs={"profile": profile})
+    panel.button("Reset", key="metrics_reset", on_click=reset)
+
+    data = snapshot()
+    if data["spans"]:
+        rows = sorted(data["spans"].items(), key=lambda item: -item[1]["total_ms"])
+        panel.dataframe([{"span": name, **{k: round(v, 3) for k, v in stats.items()}} for name, stats in rows],
+                        use_container_width=True)
+    elif _enabled:
+        panel.caption("No timings recorded yet.")
+    if data["counters"]:
+        panel.json(data["counters"])
+    report = profile_report()
+    if report:
+        panel.code(report)
+
+
+if os.environ.get("METRICS", "") not in ("", "0"):
+    enable(profile=os.environ.get("METRICS_PROFILE", "") not in ("", "0"))
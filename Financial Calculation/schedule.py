@@ -0,0 +1,73 @@
+from array import array
+
+from emi_core import monthly_rate, principal_after_education, emi, quote, education_schedule, repayment_schedule
+
+# Phase markers stored in Schedule.phase
+EDUCATION = 0
+REPAYMENT = 1
+PHASE_NAMES = {EDUCATION: "Education Period", REPAYMENT: "Repayment Period"}
+
+# Education months pay partial_payment - interest off the principal; when the
+# payment doesn't cover the interest this is negative (interest capitalised)
+PRINCIPAL_PAID = "Principal Paid (negative = interest capitalised)"
+COLUMNS = ["Phase", "Month", "Payment", "Interest Paid", PRINCIPAL_PAID, "Remaining Balance"]
+
+
+class Schedule:
+    """Amortization schedule stored column by column in typed arrays.
+
+    One entry per month: phase marker, month number within the phase, amount
+    paid, interest part, principal part (negative when unpaid interest was
+    added to the loan) and the balance left after the payment.
+    """
+
+    __slots__ = ("phase", "month", "payment", "interest", "principal", "balance",
+                 "final_principal", "emi")
+
+    def __init__(self):
+        self.phase = array("b")
+        self.month = array("i")
+        self.payment = array("d")
+        self.interest = array("d")
+        self.principal = array("d")
+        self.balance = array("d")
+        self.final_principal = 0.0
+        self.emi = 0.0
+
+    def __len__(self):
+        return len(self.month)
+
+    def append(self, phase, month, payment, interest, principal, balance):
+        self.phase.append(phase)
+        self.month.append(month)
+        self.payment.append(payment)
+        self.interest.append(interest)
+        self.principal.append(principal)
+        self.balance.append(balance)
+
+    def rows(self, phase=None):
+        """Yield (phase, month, payment, interest, principal, balance) tuples."""
+        for i in range(len(self.month)):
+            if phase is None or self.phase[i] == phase:
+                yield (self.phase[i], self.month[i], self.payment[i],
+                       self.interest[i], self.principal[i], self.balance[i])
+
+    @classmethod
+    def build(cls, P, annual_rate, edu_months, repay_months, partial_payment):
+        schedule = cls()
+        schedule.final_principal, schedule.emi = quote(P, annual_rate, edu_months, repay_months, partial_payment)
+        for row in schedule_rows(P, annual_rate, edu_months, repay_months, partial_payment):
+            schedule.append(*row)
+        return schedule
+
+
+def schedule_rows(P, annual_rate, edu_months, repay_months, partial_payment):
+    """Yield the same rows as Schedule.rows() without keeping them in memory."""
+    r = monthly_rate(annual_rate)
+    for month, interest, _, balance in education_schedule(P, r, edu_months, partial_payment):
+        yield EDUCATION, month, partial_payment, interest, partial_payment - interest, balance
+
+    P = principal_after_education(P, r, edu_months, partial_payment)
+    emi_amount = emi(P, r, repay_months)
+    for month, principal, interest, balance in repayment_schedule(P, r, repay_months, emi_amount):
+        yield REPAYMENT, month, emi_amount, interest, principal, balance
@@ -0,0 +1,101 @@
+import csv
+import os
+from itertools import islice
+
+from metrics import timed
+from schedule import schedule_rows, PHASE_NAMES, COLUMNS
+
+# Streaming CSV/PDF export of amortization schedules.
+# Rows are pulled from a generator and written out a chunk (or a page) at a
+# time, so exporting long schedules or whole portfolios never holds every
+# row in memory.
+
+CHUNK_SIZE = 1000
+ROWS_PER_PAGE = 30
+
+
+def _format_row(row):
+    phase, month, payment, interest, principal, balance = row
+    return [PHASE_NAMES[phase], month, f"{payment:.2f}", f"{interest:.2f}", f"{principal:.2f}", f"{balance:.2f}"]
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_rows(writer, rows, chunk_size, prefix=()):
+    prefix = list(prefix)
+    for chunk in _chunks(rows, chunk_size):
+        writer.writerows(prefix + _format_row(row) for row in chunk)
+
+
+@timed("emi.write_csv")
+def write_csv(file_path, rows, chunk_size=CHUNK_SIZE):
+    """
+        file_path: where to write
+        rows: iterable of (phase, month, payment, interest, principal, balance)
+    """
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        _write_rows(writer, rows, chunk_size)
+
+
+@timed("emi.write_pdf")
+def write_pdf(file_path, rows, rows_per_page=ROWS_PER_PAGE, title=None):
+    # fpdf keeps the finished pages until output(), but rows are only
+    # formatted one page at a time straight from the generator.
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(False)
+    pdf.set_font("Arial", size=10)
+    for chunk in _chunks(rows, rows_per_page):
+        pdf.add_page()
+        if title:
+            pdf.cell(200, 8, txt=title, ln=1, align='L')
+        pdf.cell(200, 8, txt="  |  ".join(COLUMNS), ln=1, align='L')
+        for row in chunk:
+            pdf.cell(200, 8, txt="  |  ".join(str(x) for x in _format_row(row)), ln=1, align='L')
+    pdf.output(file_path)
+
+
+@timed("emi.export_portfolio_csv")
+def export_portfolio_csv(loans, file_path=None, directory=None, chunk_size=CHUNK_SIZE):
+    """
+        loans: iterable of (loan_id, P, annual_rate, edu_months, repay_months, partial_payment)
+        file_path: write one combined CSV with a Loan column
+        directory: write one CSV per loan named <loan_id>.csv instead
+    """
+    if (file_path is None) == (directory is None):
+        raise ValueError("Give exactly one of file_path or directory")
+
+    count = 0
+    if directory is not None:
+        for loan_id, *terms in loans:
+            write_csv(os.path.join(directory, f"{loan_id}.csv"), schedule_rows(*terms), chunk_size)
+            count += 1
+        return count
+
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Loan"] + COLUMNS)
+        for loan_id, *terms in loans:
+            _write_rows(writer, schedule_rows(*terms), chunk_size, prefix=[loan_id])
+            count += 1
+    return count
+
+
+@timed("emi.export_portfolio_pdf")
+def export_portfolio_pdf(loans, directory, rows_per_page=ROWS_PER_PAGE):
+    count = 0
+    for loan_id, *terms in loans:
+        write_pdf(os.path.join(directory, f"{loan_id}.pdf"), schedule_rows(*terms),
+                  rows_per_page, title=f"Loan {loan_id}")
+        count += 1
+    return count
@@ -0,0 +1,117 @@
+from tkinter import ttk
+
+import numpy as np
+
+from schedule import PRINCIPAL_PAID
+
+# Plots for the EMI calculators, drawn straight from the numeric schedule
+# arrays. Long series are downsampled with Largest-Triangle-Three-Buckets,
+# which keeps peaks and turns that plain striding would drop, and many
+# loans share one LineCollection under a total point budget. matplotlib is
+# imported when the first SchedulePlot is created.
+
+POINT_BUDGET = 1000     # points per series on a single-loan plot
+OVERLAY_BUDGET = 20000  # points across all loans of an overlay
+MIN_OVERLAY_POINTS = 50
+MAX_OVERLAY_LINES = 200
+
+
+def lttb(x, y, threshold):
+    """Indices of the threshold points kept by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # First and last points are kept; the rest are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[stop:edges[i + 2]].mean(), y[stop:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Point of this bucket forming the largest triangle with the last kept
+        # point and the average of the next bucket
+        area = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(y, budget=POINT_BUDGET):
+    """(months, values) of a monthly series reduced to at most budget points; NaN padding is dropped."""
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    y = y[:valid[-1] + 1] if len(valid) else y[:0]
+    months = np.arange(1, len(y) + 1)
+    keep = lttb(months, y, budget)
+    return months[keep], y[keep]
+
+
+def overlay_lines(series, budget=OVERLAY_BUDGET, max_lines=MAX_OVERLAY_LINES):
+    """
+        series: one monthly series per loan (a list of arrays, or the rows of a
+                2-D NaN-padded array such as a BatchSchedule field)
+        Returns (shown, segments): indices of the loans drawn, evenly picked when
+        there are more than max_lines, and an (n, 2) array of points per loan.
+    """
+    shown = np.arange(len(series))
+    if len(shown) > max_lines:
+        shown = np.linspace(0, len(series) - 1, max_lines).astype(np.int64)
+    per_line = max(MIN_OVERLAY_POINTS, budget // max(1, len(shown)))
+    segments = [np.column_stack(downsample(series[i], per_line)) for i in shown]
+    return shown, segments
+
+
+class SchedulePlot(ttk.Frame):
+    """One matplotlib figure embedded in Tk, redrawn in place for every plot."""
+
+    def __init__(self, parent, point_budget=POINT_BUDGET):
+        super().__init__(parent)
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+
+        self.point_budget = point_budget
+        self.figure = Figure(figsize=(10, 5))
+        self.axes = self.figure.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self)
+        NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False).pack(side="bottom", fill="x")
+        self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+
+    def _finish(self, title, ylabel):
+        self.axes.set_title(title)
+        self.axes.set_xlabel("Month")
+        self.axes.set_ylabel(ylabel)
+        self.axes.grid(True)
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+    def show_schedule(self, schedule):
+        """Principal and interest paid per month of one Schedule."""
+        self.axes.clear()
+        # The typed arrays of Schedule are read without copying
+        for column, label in ((schedule.principal, PRINCIPAL_PAID), (schedule.interest, "Interest Paid")):
+            self.axes.plot(*downsample(np.frombuffer(column, dtype=float), self.point_budget), label=label)
+        self.axes.legend()
+        self._finish("Monthly Principal vs Interest Payment", "Amount")
+
+    def show_loans(self, series, labels=None, title="Remaining Balance", ylabel="Balance"):
+        """Overlay one monthly series per loan; the points drawn stay within OVERLAY_BUDGET."""
+        from matplotlib.collections import LineCollection
+
+        self.axes.clear()
+        shown, segments = overlay_lines(series)
+        lines = LineCollection(segments, linewidths=1, colors=[f"C{i % 10}" for i in range(len(segments))])
+        self.axes.add_collection(lines)
+        self.axes.autoscale_view()
+        if labels is not None and len(shown) <= 10:
+            for color, i in enumerate(shown):
+                self.axes.plot([], [], color=f"C{color}", label=labels[i])
+            self.axes.legend()
+        if len(shown) < len(series):
+            title = f"{title} ({len(shown)} of {len(series)} loans shown)"
+        self._finish(title, ylabel)
@@ -0,0 +1,196 @@
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from emi_core import quote
+from metrics import timed
+from schedule import Schedule, schedule_rows, EDUCATION
+
+# Tk helpers shared by the EMI calculators: the schedule is generated on a
+# worker thread, handed back through a queue polled with root.after, and
+# shown a page at a time so the Text widget never holds more than one page.
+
+PAGE_SIZE = 60
+CHUNK_SIZE = 500
+POLL_MS = 50
+
+
+# Label and type of each loan input, in the order quote() takes them
+LOAN_FIELDS = [
+    ("Loan Amount", float),
+    ("Annual Interest Rate (%)", float),
+    ("Education Period (months)", int),
+    ("Repayment Period (months)", int),
+    ("Partial Payment During Education (per month)", float),
+]
+
+
+class LoanForm:
+    """Label/entry rows for LOAN_FIELDS, gridded into parent from row 0."""
+
+    def __init__(self, parent):
+        self.vars = [tk.StringVar(parent) for _ in LOAN_FIELDS]
+        for i, ((label_text, _), var) in enumerate(zip(LOAN_FIELDS, self.vars)):
+            ttk.Label(parent, text=label_text).grid(row=i, column=0, sticky="w", padx=10, pady=5)
+            ttk.Entry(parent, textvariable=var, width=30).grid(row=i, column=1, padx=10)
+
+    def values(self):
+        """(P, annual_rate, edu_months, repay_months, partial_payment); raises ValueError on bad input."""
+        return tuple(cast(var.get()) for (_, cast), var in zip(LOAN_FIELDS, self.vars))
+
+
+def format_row(row):
+    phase, month, payment, interest, principal, _ = row
+    if phase == EDUCATION:
+        if principal >= 0:
+            return f"Month {month}: Paid {payment:.2f} → {interest:.2f} interest, {principal:.2f} reduced from principal"
+        return f"Month {month}: Paid {payment:.2f} < interest ({interest:.2f}) → {-principal:.2f} added to principal"
+    return f"Month {month}: {principal:.2f} is the principal amount, {interest:.2f} is interest"
+
+
+class PagedOutput(ttk.Frame):
+    """Text output that only renders the lines of the current page.
+
+    Items are either plain strings or schedule rows; rows are formatted
+    with format_row when their page is shown.
+    """
+
+    def __init__(self, parent, width=85, height=30, page_size=PAGE_SIZE):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.items = []
+        self.page = 0
+
+        self.text = tk.Text(self, width=width, height=height, wrap="none")
+        self.text.grid(row=0, column=0, columnspan=3, sticky="nsew")
+        ttk.Button(self, text="◀ Prev", command=self.prev_page).grid(row=1, column=0, sticky="w")
+        self.page_label = ttk.Label(self, text="")
+        self.page_label.grid(row=1, column=1)
+        ttk.Button(self, text="Next ▶", command=self.next_page).grid(row=1, column=2, sticky="e")
+
+    def page_count(self):
+        return max(1, -(-len(self.items) // self.page_size))
+
+    def clear(self):
+        self.items = []
+        self.page = 0
+        self.render()
+
+    def show_message(self, message):
+        self.items = [message]
+        self.page = 0
+        self.render()
+
+    def extend(self, items):
+        first_new = len(self.items)
+        self.items.extend(items)
+        # Only redraw when the new items land on the visible page
+        page_start = self.page * self.page_size
+        if first_new < page_start + self.page_size:
+            self.render()
+        else:
+            self.page_label.config(text=f"Page {self.page + 1} / {self.page_count()}")
+
+    def prev_page(self):
+        if self.page > 0:
+            self.page -= 1
+            self.render()
+
+    def next_page(self):
+        if self.page < self.page_count() - 1:
+            self.page += 1
+            self.render()
+
+    def render(self):
+        start = self.page * self.page_size
+        lines = [item if isinstance(item, str) else format_row(item)
+                 for item in self.items[start:start + self.page_size]]
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.page_label.config(text=f"Page {self.page + 1} / {self.page_count()}")
+
+
+class ScheduleJob:
+    """Runs schedule generation off the Tk main thread.
+
+    Starting a new job makes the results of any job still running stale;
+    they are dropped when they reach the queue.
+    """
+
+    def __init__(self, root, output, on_done=None):
+        self.root = root
+        self.output = output
+        self.on_done = on_done
+        self.queue = queue.Queue()
+        self.job_id = 0
+        self.polling = False
+        self._after = None
+
+    def start(self, P, annual_rate, edu_months, repay_months, partial_payment):
+        self.job_id += 1
+        self.output.clear()
+        worker = threading.Thread(
+            target=self._run,
+            args=(self.job_id, (P, annual_rate, edu_months, repay_months, partial_payment)),
+            daemon=True,
+        )
+        worker.start()
+        if not self.polling:
+            self.polling = True
+            self._after = self.root.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        """Make the running job, if any, stale and stop polling for it."""
+        self.job_id += 1
+        if self.polling:
+            self.root.after_cancel(self._after)
+            self.polling = False
+
+    @timed("emi.calculate")
+    def _run(self, job_id, terms):
+        try:
+            final_principal, emi_amount = quote(*terms)
+            repay_months = terms[3]
+            schedule = Schedule()
+            schedule.final_principal, schedule.emi = final_principal, emi_amount
+            chunk = ["--- Education Period Begins (Partial Payments) ---"]
+            in_education = True
+            for row in schedule_rows(*terms):
+                if job_id != self.job_id:
+                    return
+                if in_education and row[0] != EDUCATION:
+                    in_education = False
+                    chunk += ["", f"Principal after education period: {final_principal:.2f}", "",
+                              "--- Repayment Period Begins ---", f"EMI for {repay_months} months: {emi_amount:.2f}", ""]
+                schedule.append(*row)
+                chunk.append(row)
+                if len(chunk) >= CHUNK_SIZE:
+                    self.queue.put(("rows", job_id, chunk))
+                    chunk = []
+            if in_education:
+                chunk += ["", f"Principal after education period: {final_principal:.2f}"]
+            self.queue.put(("rows", job_id, chunk))
+            self.queue.put(("done", job_id, schedule))
+        except Exception as e:
+            self.queue.put(("error", job_id, f"Error: {str(e)}"))
+
+    def _poll(self):
+        # Polls until the current job is done or failed; start() resumes it
+        try:
+            while True:
+                kind, job_id, payload = self.queue.get_nowait()
+                if job_id != self.job_id:
+                    continue
+                if kind == "rows":
+                    self.output.extend(payload)
+                    continue
+                if kind == "error":
+                    self.output.show_message(payload)
+                elif kind == "done" and self.on_done:
+                    self.on_done(payload)
+                self.polling = False
+                return
+        except queue.Empty:
+            pass
+        self._after = self.root.after(POLL_MS, self._poll)
@@ -0,0 +1,355 @@
+"""
+Benchmarks for the hot paths of the repo.
+
+    python benchmarks/run_benchmarks.py                    # quick scale, print a table
+    python benchmarks/run_benchmarks.py --scale full       # knapsack up to 10^7 items, 10^5 books
+    python benchmarks/run_benchmarks.py --only knapsack emi
+    python benchmarks/run_benchmarks.py -o results.json    # also write the results as JSON
+    python benchmarks/run_benchmarks.py --save-baseline    # store as baselines/<scale>.json
+    python benchmarks/run_benchmarks.py --compare          # compare with baselines/<scale>.json
+
+--compare exits with status 1 when any benchmark got slower than the
+baseline by more than --threshold (default 25%) and by at least
+--min-delta seconds. Baselines are timings
+from one machine, so refresh them with --save-baseline after moving.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+# The code lives in loose script folders (some with spaces in the name)
+for folder in ("Algorithm/Greedy", "Financial Calculation",
+               "Financial Calculation/Book Manager", "Financial Calculation/GATE"):
+    sys.path.insert(0, str(ROOT / folder))
+
+SCALES = {
+    "quick": {"knapsack": [10**3, 10**4, 10**5], "loans": 2_000, "books": 10**4, "topics": 10**4, "repeat": 5},
+    "full": {"knapsack": [10**3, 10**4, 10**5, 10**6, 10**7], "loans": 20_000, "books": 10**5, "topics": 10**5,
+             "repeat": 3},
+}
+THRESHOLD = 0.25
+# Sub-millisecond benchmarks jitter by more than THRESHOLD; changes smaller
+# than this many seconds are never flagged
+MIN_DELTA = 0.001
+
+GROUPS = {}
+
+
+def group(name):
+    """Register a benchmark group: a generator that does its setup and yields (case name, callable).
+
+    A case may also yield (case name, callable, setup); setup runs untimed
+    before the warm-up and before every timed run.
+    """
+    def register(func):
+        GROUPS[name] = func
+        return func
+    return register
+
+
+# ---------- Cases ----------
+
+@group("knapsack")
+def knapsack_cases(scale):
+    import numpy as np
+    from fractional_knapsack import (fractional_knapsack, fractional_knapsack_select,
+                                     fractional_knapsack_numpy, FractionalKnapsackSolver)
+
+    rng = random.Random(0)
+    for n in scale["knapsack"]:
+        weights = [rng.randint(1, 100) for _ in range(n)]
+        values = [rng.randint(1, 500) for _ in range(n)]
+        capacity = sum(weights) // 3
+        weights_np, values_np = np.array(weights), np.array(values)
+        yield f"sort[n={n}]", lambda: fractional_knapsack(capacity, weights, values)
+        # The pivots are random: seed them so every run does the same work
+        yield f"select[n={n}]", lambda: fractional_knapsack_select(capacity, weights, values), lambda: random.seed(0)
+        yield f"numpy[n={n}]", lambda: fractional_knapsack_numpy(capacity, weights_np, values_np, seed=0)
+        solver = FractionalKnapsackSolver(weights, values)
+        capacities = np.linspace(0, sum(weights), 1000)
+        solver.query(capacity)  # build the prefix sums outside the timing
+        yield f"solver_query_many[n={n}]", lambda: solver.query_many(capacities)
+
+
+@group("emi")
+def emi_cases(scale):
+    import numpy as np
+    from emi_core import quote
+    from emi_engine import batch_emi, batch_schedule
+    from schedule import Schedule
+
+    rng = random.Random(0)
+    loans = [(rng.uniform(1e5, 2e6), rng.uniform(6, 14), rng.randint(12, 60), rng.randint(60, 360),
+              rng.uniform(0, 10_000)) for _ in range(scale["loans"])]
+    columns = [np.array(column) for column in zip(*loans)]
+    n = len(loans)
+
+    # What calculate_emi_with_partial_payment computes for each loan
+    yield f"quote[loans={n}]", lambda: [quote(*loan) for loan in loans]
+    yield f"batch_emi[loans={n}]", lambda: batch_emi(*columns)
+    yield "schedule_build[loans=100]", lambda: [Schedule.build(*loan) for loan in loans[:100]]
+    yield "schedule_build_long[months=1200]", lambda: Schedule.build(1e6, 9.5, 120, 1080, 2000)
+    yield "batch_schedule[loans=1000]", lambda: batch_schedule(*(c[:1000] for c in columns))
+
+
+@group("database")
+def database_cases(scale):
+    import database
+
+    n = scale["books"]
+    rng = random.Random(0)
+    words = ["river", "shadow", "garden", "empire", "silent", "machine", "winter", "ocean", "stone", "light"]
+    genres = ["Fiction", "History", "Science", "Biography", "Fantasy"]
+
+    def book(i):
+        return (f"{rng.choice(words).title()} {rng.choice(words)} {i}", f"Author {i % 500}", rng.choice(genres),
+                f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", round(rng.uniform(1, 60), 2), "",
+                rng.choice(database.STATUSES), rng.choice(words))
+
+    old_path = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        read_path = os.path.join(tmp, "books.db")
+        seed_path = os.path.join(tmp, "seed.db")
+        write_path = os.path.join(tmp, "writes.db")
+        database.DB_PATH = read_path
+        try:
+            database.init_db()
+            rows = [book(i) for i in range(n)]
+            database.add_books_many(rows)
+            ids = [rng.randint(1, n) for _ in range(200)]
+            database.get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            shutil.copyfile(read_path, seed_path)
+
+            def fresh_copy():
+                # Writes go to a fresh copy of the seeded table, so every run
+                # starts from n rows and the read cases never see them
+                database.close_connection()
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(write_path + suffix):
+                        os.remove(write_path + suffix)
+                shutil.copyfile(seed_path, write_path)
+                database.DB_PATH = write_path
+
+            def cold(func, *args, **kwargs):
+                # Measure SQLite, not the read cache
+                def run():
+                    database.clear_cache()
+                    return func(*args, **kwargs)
+                return run
+
+            def add_books():
+                for i in range(200):
+                    database.add_book(book(n + i))
+
+            def update_books():
+                for book_id in ids:
+                    database.update_book(book_id, book(book_id))
+
+            def walk_pages(pages=50):
+                database.clear_cache()
+                after_id = 0
+                for _ in range(pages):
+                    page = database.get_books_page(after_id)
+                    if not page:
+                        break
+                    after_id = page[-1][0]
+
+            def lookup_books():
+                database.clear_cache()
+                for book_id in ids:
+                    database.get_book(book_id)
+
+            yield f"get_book[x200,table={n}]", lookup_books
+            yield f"get_books[table={n}]", cold(database.get_books)
+            yield f"get_books_page[x50,table={n}]", walk_pages
+            yield f"search_books[word,table={n}]", cold(database.search_books, "shadow")
+            yield f"search_books[prefix,table={n}]", cold(database.search_books, "gar", limit=None)
+            yield f"get_summary[table={n}]", cold(database.get_summary)
+            yield f"get_breakdown[table={n}]", cold(database.get_breakdown, "genre")
+            # Last: fresh_copy leaves DB_PATH on the copy
+            yield f"add_books_many[rows=10000,table={n}]", lambda: database.add_books_many(rows[:10_000]), fresh_copy
+            yield f"add_book[x200,table={n}]", add_books, fresh_copy
+            yield f"update_book[x200,table={n}]", update_books, fresh_copy
+        finally:
+            database.close_connection()
+            database.clear_cache()
+            database.DB_PATH = old_path
+
+
+@group("gate")
+def gate_cases(scale):
+    import pandas as pd
+    from progress import ProgressAggregator, get_weighted_progress
+    from storage import get_store
+
+    n = scale["topics"]
+    rng = random.Random(0)
+    subjects = [f"Subject {i}" for i in range(12)]
+    topics = pd.DataFrame({
+        "Subject": [rng.choice(subjects) for _ in range(n)],
+        "Topic": [f"Topic {i}" for i in range(n)],
+        "Completed": [rng.random() < 0.4 for _ in range(n)],
+        "Target Date": pd.to_datetime("2025-01-01") + pd.to_timedelta([rng.randint(0, 365) for _ in range(n)], "D"),
+        "Notes": [""] * n,
+    })
+    weights = pd.Series({s: rng.randint(1, 10) for s in subjects}, name="Weight")
+    weights.index.name = "Subject"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = os.path.join(tmp, "gate_progress.csv")
+        weight_file = os.path.join(tmp, "subject_weights.csv")
+        topics.to_csv(csv_file, index=False, date_format="%Y-%m-%d")
+        weights.reset_index().to_csv(weight_file, index=False)
+        stores = {
+            "csv": get_store("csv", csv_file=csv_file, weight_file=weight_file),
+            "sqlite": get_store("sqlite", path=os.path.join(tmp, "gate.db"), csv_file=csv_file,
+                                weight_file=weight_file),
+        }
+        try:
+            for backend, store in stores.items():
+                df = store.load_topics()
+
+                def cycle(store=store):
+                    # load_data -> toggle a topic -> save_data -> get_weighted_progress
+                    df = store.load_topics().copy()
+                    df.loc[df.index[0], "Completed"] = not df["Completed"].iloc[0]
+                    store.replace_topics(df)
+                    return get_weighted_progress(df, store.load_weights())
+
+                def add_and_load(store=store):
+                    # What a rerun after adding a topic does
+                    store.add_topic({"Subject": "Subject 0", "Topic": "New", "Completed": False,
+                                     "Target Date": pd.Timestamp("2025-06-01"), "Notes": ""})
+                    return store.load_topics()
+
+                yield f"{backend}.load_data[topics={n}]", store.load_topics
+                yield f"{backend}.load_data_cold[topics={n}]", store.load_topics, store.clear_cache
+                yield f"{backend}.add_topic+load[topics={n}]", add_and_load
+                yield f"{backend}.save_data[topics={n}]", lambda store=store, df=df: store.replace_topics(df)
+                yield f"{backend}.cycle[topics={n}]", cycle
+
+            df = stores["sqlite"].load_topics()
+            yield f"get_weighted_progress[topics={n}]", lambda: get_weighted_progress(df, weights)
+            aggregator = ProgressAggregator.from_frame(df, weights)
+
+            def toggle():
+                aggregator.update("Subject 0", False, "Subject 0", True)
+                aggregator.update("Subject 0", True, "Subject 0", False)
+                return aggregator.weighted_progress()
+
+            yield f"aggregator.from_frame[topics={n}]", lambda: ProgressAggregator.from_frame(df, weights)
+            yield f"aggregator.toggle[topics={n}]", toggle
+        finally:
+            stores["sqlite"].conn.close()
+
+
+# ---------- Harness ----------
+
+def _time(func, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(scale_name, groups=None, repeat=None):
+    scale = SCALES[scale_name]
+    repeat = repeat or scale["repeat"]
+    results = {}
+    for name, cases in GROUPS.items():
+        if groups and name not in groups:
+            continue
+        for case, func, *setup in cases(scale):
+            key = f"{name}.{case}"
+            setup = setup[0] if setup else None
+            if setup:
+                setup()
+            func()  # warm-up
+            times = _time(func, repeat, setup)
+            results[key] = {"min": min(times), "median": statistics.median(times), "runs": repeat}
+            print(f"{key:<55} {min(times) * 1000:>12.3f} ms", flush=True)
+    return {
+        "scale": scale_name,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=THRESHOLD, min_delta=MIN_DELTA):
+    """Print current vs baseline minimum times; returns the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<55} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            print(f"{key:<55} {'-':>12} {result['min'] * 1000:>12.3f} {'new':>8}")
+            continue
+        before = baseline["results"][key]["min"]
+        change = result["min"] / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold and result["min"] - before > min_delta:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<55} {before * 1000:>12.3f} {result['min'] * 1000:>12.3f} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the repo's hot paths")
+    parser.add_argument("--scale", choices=SCALES, default="quick")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, help="benchmark groups to run")
+    parser.add_argument("--repeat", type=int, help="timed runs per benchmark")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--compare", nargs="?", const="", metavar="BASELINE",
+                        help="compare with a baseline file (default: the stored one for --scale)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown that counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA,
+                        help="smallest slowdown in seconds that counts as a regression")
+    args = parser.parse_args(argv)
+
+    current = run(args.scale, args.only, args.repeat)
+    baseline_file = BASELINE_DIR / f"{args.scale}.json"
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        if baseline_file.exists() and args.only:
+            # Keep the stored results of the groups that were not run
+            with open(baseline_file) as f:
+                current["results"] = {**json.load(f)["results"], **current["results"]}
+        with open(baseline_file, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved baseline to {baseline_file}")
+    if args.compare is not None:
+        with open(args.compare or baseline_file) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))